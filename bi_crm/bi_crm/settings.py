@@ -126,6 +126,44 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Versioned ML model artifacts (see crm.model_registry)
+
+ML_MODEL_DIR = Path(os.getenv("ML_MODEL_DIR", BASE_DIR / "model_store"))
+
+# Append-only store of raw scraper responses (see crm.response_store)
+
+SCRAPE_CACHE_DIR = Path(os.getenv("SCRAPE_CACHE_DIR", BASE_DIR / "scrape_cache"))
+
+# Days of PriceHistory kept at full resolution before compaction (see crm.pricing)
+
+PRICE_HISTORY_RETENTION_DAYS = int(os.getenv("PRICE_HISTORY_RETENTION_DAYS", 90))
+
+# Response cache for the JSON endpoints (see crm.caching). CACHE_BACKEND is
+# "file" (shared by the processes of one host, the default), "redis" (shared
+# by every host) or "locmem" (per process). Invalidations from management
+# commands only reach web workers through a shared backend, so locmem is only
+# suitable for a single-process development server. CACHE_LOCATION overrides
+# the directory or Redis URL. The redis backend needs the optional redis
+# package (pip install redis), which requirements.txt leaves out.
+
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "crm-responses"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", str(BASE_DIR / "response_cache")),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/1"),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.getenv("CACHE_BACKEND", "file")]
+CACHES = {
+    "default": {
+        "BACKEND": _cache_backend,
+        "LOCATION": os.getenv("CACHE_LOCATION", _cache_location),
+        "TIMEOUT": 300,
+    }
+}
+
+# Threads running CPU-heavy scoring for the async views (see crm.async_views)
+
+ASYNC_SCORING_WORKERS = int(os.getenv("ASYNC_SCORING_WORKERS", 4))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
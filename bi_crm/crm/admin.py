@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    CustomerSegment, Customer, Product, PriceHistory, 
+    CustomerSegment, Customer, Product, ProductDetail, PriceHistory, DailyPriceRollup,
     Order, OrderItem, Review, ChurnPrediction, SalesForecast
 )
 
@@ -15,6 +15,20 @@ class CustomerAdmin(admin.ModelAdmin):
     list_filter = ('segment',)
     ordering = ('-last_purchase_date',)
 
+class ProductDetailInline(admin.StackedInline):
+    model = ProductDetail
+    can_delete = False
+    # Make JSON fields read-only for convenience.
+    readonly_fields = (
+        'product_information', 
+        'product_details', 
+        'product_photos', 
+        'product_videos', 
+        'category_path', 
+        'product_variations', 
+        'more_info'
+    )
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     # Display a subset of fields in the list view for clarity.
@@ -25,6 +39,7 @@ class ProductAdmin(admin.ModelAdmin):
         'price', 
         'original_price', 
         'rating', 
+        'sales_volume_units',
         'is_best_seller', 
         'is_prime'
     )
@@ -34,16 +49,8 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ('category', 'is_best_seller', 'is_prime', 'currency', 'country')
     # Order products by price in descending order.
     ordering = ('-price',)
-    # Make JSON fields and large descriptive fields read-only for convenience.
-    readonly_fields = (
-        'product_information', 
-        'product_details', 
-        'product_photos', 
-        'product_videos', 
-        'category_path', 
-        'product_variations', 
-        'more_info'
-    )
+    # Bulky scraped payloads are edited alongside the product.
+    inlines = (ProductDetailInline,)
 
 @admin.register(PriceHistory)
 class PriceHistoryAdmin(admin.ModelAdmin):
@@ -51,6 +58,12 @@ class PriceHistoryAdmin(admin.ModelAdmin):
     list_filter = ('platform', 'product')
     ordering = ('-scraped_date',)
 
+@admin.register(DailyPriceRollup)
+class DailyPriceRollupAdmin(admin.ModelAdmin):
+    list_display = ('product', 'platform', 'date', 'open_price', 'high_price', 'low_price', 'close_price', 'sample_count')
+    list_filter = ('platform',)
+    ordering = ('-date',)
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('order_number', 'customer', 'order_date', 'total_amount', 'status')
@@ -79,8 +92,8 @@ class ChurnPredictionAdmin(admin.ModelAdmin):
 
 @admin.register(SalesForecast)
 class SalesForecastAdmin(admin.ModelAdmin):
-    list_display = ('forecast_date', 'predicted_sales', 'period', 'created_at')
-    list_filter = ('period',)
+    list_display = ('forecast_date', 'predicted_sales', 'period', 'method', 'measure', 'created_at')
+    list_filter = ('period', 'method', 'measure')
     ordering = ('-forecast_date',)
 
 # --------------------------
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CrmConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crm'
+
+    def ready(self):
+        # Connects the cache invalidation signal receivers.
+        from . import caching  # noqa: F401
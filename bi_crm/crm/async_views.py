@@ -0,0 +1,152 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import render
+
+from .caching import cached_json_view
+from .ml_models import apredict_churn_many
+from .models import Customer, Order, Product
+from .pagination import InvalidCursor, akeyset_paginate, page_size_from
+from .pricing import price_rollups, summarise_price_trends
+from .recommendations import purchased_products, rank_products, recommendation_index
+from .views import (
+    CUSTOMER_LIST_FIELDS, CUSTOMER_SORTS, ORDER_LIST_FIELDS, ORDER_ORDERING, PRODUCT_LIST_FIELDS, PRODUCT_ORDERING,
+    _customer_sort, _json_page, churn_request_ids, churn_response, id_param, invalid_id_response,
+    sales_forecast_response, sales_forecast_rows,
+)
+
+# --------------------------
+# Async Views
+# --------------------------
+# Async variants of the list and JSON views, for running under an ASGI server
+# (e.g. ``uvicorn bi_crm.asgi:application``) and mounted under /async/. Queries
+# go through the async ORM, so a request waiting on the database holds no
+# worker thread. CPU-heavy scoring runs off the event loop: churn scoring is
+# awaited on the shared micro-batcher, and recommendation ranking runs in a
+# small bounded thread pool so a burst of requests cannot starve the loop.
+# Compare against the sync views with the load_test command.
+
+scoring_executor = ThreadPoolExecutor(max_workers=settings.ASYNC_SCORING_WORKERS, thread_name_prefix="crm-scoring")
+
+
+async def run_scoring(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(scoring_executor, func, *args)
+
+
+async def _list_page(request, queryset, ordering):
+    return await akeyset_paginate(queryset, ordering, request.GET.get('cursor'), page_size_from(request))
+
+# Customers
+async def customer_list(request):
+    sort = _customer_sort(request)
+    customers = Customer.objects.select_related('segment').only(*CUSTOMER_LIST_FIELDS)
+    try:
+        page = await _list_page(request, customers, CUSTOMER_SORTS[sort])
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    return render(request, 'crm/customers.html', {'customers': page.items, 'page': page, 'sort': sort})
+
+async def customer_list_api(request):
+    customers = Customer.objects.values(*CUSTOMER_LIST_FIELDS)
+    try:
+        return _json_page(await _list_page(request, customers, CUSTOMER_SORTS[_customer_sort(request)]))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+@cached_json_view(ttl=300, depends_on=('customers',))
+async def customer_detail(request, id):
+    try:
+        customer = await Customer.objects.only('first_name', 'last_name', 'email').aget(id=id)
+    except Customer.DoesNotExist:
+        raise Http404(f"Customer {id} not found.")
+    return JsonResponse({'customer': {'name': f"{customer.first_name} {customer.last_name}", 'email': customer.email}})
+
+# Products
+async def product_list(request):
+    products = Product.objects.only(*PRODUCT_LIST_FIELDS)
+    try:
+        page = await _list_page(request, products, PRODUCT_ORDERING)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    return render(request, 'crm/products.html', {'products': page.items, 'page': page})
+
+async def product_list_api(request):
+    products = Product.objects.values(*PRODUCT_LIST_FIELDS)
+    try:
+        return _json_page(await _list_page(request, products, PRODUCT_ORDERING))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+# Orders
+async def order_list(request):
+    orders = Order.objects.select_related('customer').only(*ORDER_LIST_FIELDS)
+    try:
+        page = await _list_page(request, orders, ORDER_ORDERING)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    return render(request, 'crm/orders.html', {'orders': page.items, 'page': page})
+
+async def order_list_api(request):
+    orders = Order.objects.values(*ORDER_LIST_FIELDS)
+    try:
+        return _json_page(await _list_page(request, orders, ORDER_ORDERING))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+# Churn Prediction View
+@cached_json_view(ttl=300, depends_on=('customers', 'orders', 'churn_model'))
+async def churn_prediction(request):
+    try:
+        customer_ids, batch = churn_request_ids(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    try:
+        scores = await apredict_churn_many(customer_ids)
+    except RuntimeError as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    return churn_response(customer_ids, batch, scores)
+
+# Sales Forecasting View
+@cached_json_view(ttl=900, depends_on=('forecasts',))
+async def sales_forecast(request):
+    try:
+        product_id = id_param(request, 'product_id')
+    except ValueError:
+        return invalid_id_response('product_id')
+    forecasts = [forecast async for forecast in sales_forecast_rows(product_id)]
+    return sales_forecast_response(product_id, forecasts)
+
+# Product Recommendation View
+def _rank_for(purchased, limit):
+    index = recommendation_index.get()
+    if index is None:
+        return []
+    return rank_products(index, np.array(purchased, dtype=np.int64), limit)
+
+@cached_json_view(ttl=300, depends_on=('orders', 'recommendations'))
+async def product_recommendations(request):
+    try:
+        customer_id = id_param(request, 'customer_id')
+    except ValueError:
+        return invalid_id_response('customer_id')
+    purchased = [pk async for pk in purchased_products(customer_id)]
+    ranked = await run_scoring(_rank_for, purchased, 3)
+    names = {
+        pk: name async for pk, name in Product.objects.filter(id__in=[pk for pk, _ in ranked]).values_list('id', 'name')
+    }
+    return JsonResponse({'customer_id': customer_id, 'recommended_products': [
+        {'product_id': pk, 'name': names.get(pk), 'score': round(score, 4)} for pk, score in ranked
+    ]})
+
+# Pricing Insights View
+@cached_json_view(ttl=900, depends_on=('prices',))
+async def pricing_insights(request):
+    try:
+        product_id = id_param(request, 'product_id')
+    except ValueError:
+        return invalid_id_response('product_id')
+    rollups = [row async for row in price_rollups(product_id)]
+    return JsonResponse(summarise_price_trends(product_id, rollups))
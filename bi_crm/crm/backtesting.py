@@ -0,0 +1,166 @@
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from django.db import connection
+from django.utils.timezone import make_aware, now
+
+from .forecasting import DEFAULT_SALES_MEASURE, PERIOD_TRUNCATORS, SALES_MEASURES, period_ordinals, period_starts
+from .ml_models import DEFAULT_CHUNK_SIZE, iter_value_chunks
+from .models import OrderItem, Product, SalesForecast
+
+# --------------------------
+# Sales Forecast Backtesting
+# --------------------------
+# Stored SalesForecast rows of one method and measure are compared with
+# realised OrderItem sales for the same product and period. Each of the last
+# N completed periods is one rolling-origin window. Products are processed in
+# id-range chunks on a thread pool. Both queries are bounded to the evaluated
+# windows and each chunk only adds to a few per-window sums, so memory stays
+# bounded however much order and forecast history there is.
+
+# Bit offset packing (product_id, period ordinal) into one sortable int64 key.
+_KEY_SHIFT = 24
+
+# Per-window accumulators: absolute error, squared error, absolute % error,
+# number of rows, number of rows with a non-zero actual (for MAPE).
+_SUMS = ("abs_error", "sq_error", "abs_pct_error", "count", "pct_count")
+
+
+def _pack(product_ids, ordinals):
+    return (np.asarray(product_ids, dtype=np.int64) << _KEY_SHIFT) | ordinals
+
+
+def _backtest_chunk(first_id, last_id, period, method, measure, first_ordinal, windows):
+    """
+    Backtests one product id range. Returns per-window sums and stage timings.
+    """
+    timings = defaultdict(float)
+    start, end = (day.item() for day in period_starts([first_ordinal, first_ordinal + windows], period))
+    try:
+        started = time.perf_counter()
+        actual_rows = list(
+            OrderItem.objects.filter(
+                product_id__gte=first_id, product_id__lte=last_id,
+                order__order_date__gte=make_aware(datetime.combine(start, datetime.min.time())),
+                order__order_date__lt=make_aware(datetime.combine(end, datetime.min.time())),
+            )
+            .exclude(order__status="Cancelled")
+            .annotate(bucket=PERIOD_TRUNCATORS[period]("order__order_date"))
+            .values("product_id", "bucket")
+            .annotate(value=SALES_MEASURES[measure]())
+            .values_list("product_id", "bucket", "value")
+        )
+        timings["actuals query"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        forecast_rows = list(
+            SalesForecast.objects.filter(
+                product_id__gte=first_id, product_id__lte=last_id, period=period, method=method, measure=measure,
+                forecast_date__gte=start, forecast_date__lt=end,
+            )
+            .values_list("product_id", "forecast_date", "predicted_sales")
+        )
+        timings["forecasts query"] += time.perf_counter() - started
+    finally:
+        # Each pool thread opens its own connection; don't leak it.
+        connection.close()
+
+    sums = np.zeros((len(_SUMS), windows))
+    if not forecast_rows:
+        return sums, timings
+
+    started = time.perf_counter()
+    f_ids, f_dates, f_sales = zip(*forecast_rows)
+    f_ordinals = period_ordinals(f_dates, period)
+    window = f_ordinals - first_ordinal
+    in_range = (window >= 0) & (window < windows)
+    f_keys = _pack(f_ids, f_ordinals)[in_range]
+    predicted = np.array(f_sales, dtype=np.float64)[in_range]
+    window = window[in_range]
+
+    actual = np.zeros(len(f_keys))
+    if actual_rows:
+        a_ids, a_buckets, a_values = zip(*actual_rows)
+        a_keys = _pack(a_ids, period_ordinals([bucket.date() for bucket in a_buckets], period))
+        order = np.argsort(a_keys)
+        a_keys = a_keys[order]
+        a_values = np.array(a_values, dtype=np.float64)[order]
+        positions = np.clip(np.searchsorted(a_keys, f_keys), 0, len(a_keys) - 1)
+        matched = a_keys[positions] == f_keys
+        # A period with no order lines realised zero sales.
+        actual = np.where(matched, a_values[positions], 0.0)
+    timings["alignment"] += time.perf_counter() - started
+
+    started = time.perf_counter()
+    error = np.abs(predicted - actual)
+    nonzero = actual > 0
+    pct_error = np.divide(error, actual, out=np.zeros_like(error), where=nonzero) * 100
+    sums[0] = np.bincount(window, weights=error, minlength=windows)
+    sums[1] = np.bincount(window, weights=error ** 2, minlength=windows)
+    sums[2] = np.bincount(window, weights=pct_error, minlength=windows)
+    sums[3] = np.bincount(window, minlength=windows)
+    sums[4] = np.bincount(window, weights=nonzero, minlength=windows)
+    timings["metrics"] += time.perf_counter() - started
+    return sums, timings
+
+
+def _metrics(abs_error, sq_error, abs_pct_error, count, pct_count):
+    if not count:
+        return {"count": 0, "mae": None, "rmse": None, "mape": None}
+    return {
+        "count": int(count),
+        "mae": abs_error / count,
+        "rmse": float(np.sqrt(sq_error / count)),
+        "mape": abs_pct_error / pct_count if pct_count else None,
+    }
+
+
+def backtest_sales_forecasts(period="Monthly", windows=6, chunk_size=DEFAULT_CHUNK_SIZE, workers=4,
+                             method="sentiment", measure=DEFAULT_SALES_MEASURE):
+    """
+    Scores the forecasts stored by ``method`` for ``measure`` (quantity or
+    revenue) against realised sales for each of the last ``windows`` completed
+    periods.
+
+    Returns:
+        dict: ``windows`` (one metrics dict per period, oldest first), ``overall``
+        metrics, and ``timings`` (seconds per stage, summed across workers, plus
+        wall-clock ``total``).
+    """
+    if measure not in SALES_MEASURES:
+        raise ValueError(f"Unknown measure '{measure}', expected one of {sorted(SALES_MEASURES)}.")
+    if period not in PERIOD_TRUNCATORS:
+        raise ValueError(f"Unknown period '{period}', expected one of {sorted(PERIOD_TRUNCATORS)}.")
+
+    started = time.perf_counter()
+    # Only completed periods can be scored: the current one has not been realised yet.
+    current_ordinal = int(period_ordinals([now().date()], period)[0])
+    first_ordinal = current_ordinal - windows
+
+    sums = np.zeros((len(_SUMS), windows))
+    timings = defaultdict(float)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_backtest_chunk, ids[0][0], ids[-1][0], period, method, measure, first_ordinal, windows)
+            for ids in iter_value_chunks(Product.objects.all(), ("id",), chunk_size)
+        ]
+        for future in futures:
+            chunk_sums, chunk_timings = future.result()
+            sums += chunk_sums
+            for stage, seconds in chunk_timings.items():
+                timings[stage] += seconds
+
+    window_starts = period_starts(np.arange(first_ordinal, current_ordinal), period)
+
+    timings["total"] = time.perf_counter() - started
+    return {
+        "windows": [
+            dict(period_start=str(start), **_metrics(*sums[:, i]))
+            for i, start in enumerate(window_starts)
+        ],
+        "overall": _metrics(*sums.sum(axis=1)),
+        "timings": dict(timings),
+    }
@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Customer, Order, OrderItem, PriceHistory, SalesForecast
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# JSON Response Cache
+# --------------------------
+# Responses are cached in the configured Django cache (settings.CACHES) under a
+# key built from the request path, the query string and the current
+# *generation* of every topic the endpoint depends on. A write bumps the
+# generation of its topic, which orphans every response built from the old
+# data at once without having to know their keys; orphans expire with their
+# TTL. Each cached response carries an ETag and a Last-Modified date, so
+# polling clients revalidate with a cheap 304 instead of re-downloading.
+
+KEY_PREFIX = "crm:response"
+GENERATION_PREFIX = "crm:generation"
+
+# Model writes that invalidate a topic. Bulk writers (bulk_create/bulk_update
+# send no signals) call invalidate() themselves.
+MODEL_TOPICS = {
+    Customer: "customers",
+    Order: "orders",
+    OrderItem: "orders",
+    PriceHistory: "prices",
+    SalesForecast: "forecasts",
+}
+
+
+def _generation_key(topic):
+    return f"{GENERATION_PREFIX}:{topic}"
+
+
+def generations(topics):
+    """
+    Returns the current generation of each topic. A missing counter (never
+    set, or evicted) is seeded with the clock so it cannot fall back to a
+    value that older cached responses were stored under.
+    """
+    keys = [_generation_key(topic) for topic in topics]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _bump(topics):
+    for topic in topics:
+        key = _generation_key(topic)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate(*topics):
+    """
+    Invalidates every cached response that depends on any of ``topics``. Inside
+    a transaction the bump waits for the commit, so a concurrent request can
+    never cache pre-commit data under the new generation.
+    """
+    def bump():
+        try:
+            _bump(topics)
+        except Exception:
+            logger.exception("Could not invalidate cached responses for %s.", topics)
+
+    transaction.on_commit(bump)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_on_write(sender, **kwargs):
+    topic = MODEL_TOPICS.get(sender)
+    if topic is not None:
+        invalidate(topic)
+
+
+def _response_key(request, topics):
+    query = "&".join(sorted(request.GET.urlencode().split("&")))
+    raw = f"{request.path}?{query}|{generations(topics)}"
+    return f"{KEY_PREFIX}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def _lookup(request, topics):
+    """
+    Returns ``(key, cached entry or None)``, or ``(None, None)`` if the cache
+    backend is unreachable.
+    """
+    try:
+        key = _response_key(request, topics)
+        return key, cache.get(key)
+    except Exception:
+        logger.exception("Response cache unavailable, serving %s uncached.", request.path)
+        return None, None
+
+
+def _store(request, key, response, ttl):
+    entry = {
+        "content": response.content,
+        "content_type": response["Content-Type"],
+        "etag": f'"{hashlib.md5(response.content).hexdigest()}"',
+        "last_modified": int(time.time()),
+    }
+    try:
+        cache.set(key, entry, timeout=ttl)
+    except Exception:
+        logger.exception("Could not cache the response for %s.", request.path)
+    return entry
+
+
+def _respond(request, entry):
+    response = HttpResponse(entry["content"], content_type=entry["content_type"])
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(entry["last_modified"])
+    # Clients may keep the body but must revalidate it on every poll.
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(
+        request, etag=entry["etag"], last_modified=entry["last_modified"], response=response,
+    )
+
+
+def cached_json_view(ttl, depends_on=()):
+    """
+    Caches a JSON view's successful GET responses for ``ttl`` seconds, or until
+    one of the ``depends_on`` topics is invalidated, and answers conditional
+    requests (If-None-Match / If-Modified-Since) with 304 Not Modified.
+    If the cache backend is unreachable the view is simply served uncached.
+    Works for sync and async views alike.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+                # Cache clients are thread-safe, so lookups need not queue behind the ORM's thread.
+                key, entry = await sync_to_async(_lookup, thread_sensitive=False)(request, depends_on)
+                if entry is None:
+                    response = await view(request, *args, **kwargs)
+                    if key is None or response.status_code != 200:
+                        return response
+                    entry = await sync_to_async(_store, thread_sensitive=False)(request, key, response, ttl)
+                return _respond(request, entry)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            key, entry = _lookup(request, depends_on)
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                if key is None or response.status_code != 200:
+                    return response
+                entry = _store(request, key, response, ttl)
+            return _respond(request, entry)
+        return wrapper
+    return decorator
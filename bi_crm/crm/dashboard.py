@@ -0,0 +1,208 @@
+import heapq
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .forecasting import PERIOD_TRUNCATORS, SALES_MEASURES
+from .models import ChurnPrediction, Customer, DashboardSnapshot, JobWatermark, Order, OrderItem, Product, SalesForecast
+from .recommendations import recommendation_index
+
+# --------------------------
+# Dashboard Snapshot
+# --------------------------
+# refresh_dashboard() runs in the background (the refresh_dashboard command)
+# and stores everything the dashboard shows in one DashboardSnapshot row, so
+# the page itself is a single primary-key lookup whatever the data size.
+# Refreshes are incremental: monthly sales only add the order items created
+# since the order-item watermark, and the at-risk list only merges churn
+# predictions created since the prediction watermark. The churn rate and
+# per-segment counts are recomputed every time, because segment assignments
+# and customers change without new predictions being written.
+
+SNAPSHOT_NAME = "dashboard"
+ORDER_ITEMS_WATERMARK = "dashboard_order_items"
+PREDICTIONS_WATERMARK = "dashboard_churn_predictions"
+
+AT_RISK_DISPLAYED = 10
+# Candidates kept between refreshes so at-risk customers can be updated without a rescan.
+AT_RISK_POOL = 200
+AT_RISK_THRESHOLD = 0.5
+SALES_MONTHS_DISPLAYED = 12
+RECOMMENDATIONS_DISPLAYED = 5
+# The page flags the snapshot as stale after this long without a refresh.
+STALE_AFTER = timedelta(minutes=15)
+
+
+def _advance(watermark_name, model, full):
+    """
+    Returns the ``(after, up_to)`` id range of rows not yet folded in, and
+    moves the watermark to ``up_to`` (committed with the snapshot).
+    """
+    watermark, _ = JobWatermark.objects.select_for_update().get_or_create(name=watermark_name)
+    after = 0 if full else watermark.last_id
+    up_to = model.objects.aggregate(latest=Max("id"))["latest"] or 0
+    watermark.last_id = up_to
+    watermark.save(update_fields=["last_id", "updated_at"])
+    return after, up_to
+
+
+def _refresh_sales(data, full):
+    after, up_to = _advance(ORDER_ITEMS_WATERMARK, OrderItem, full)
+    monthly = {} if full else dict(data.get("monthly_sales", {}))
+    if up_to > after:
+        new_sales = (
+            OrderItem.objects.filter(id__gt=after, id__lte=up_to)
+            .exclude(order__status="Cancelled")
+            .annotate(month=PERIOD_TRUNCATORS["Monthly"]("order__order_date"))
+            .values("month")
+            .annotate(sales=SALES_MEASURES["revenue"]())
+            .values_list("month", "sales")
+        )
+        for month, sales in new_sales:
+            key = month.strftime("%Y-%m")
+            monthly[key] = round(monthly.get(key, 0.0) + float(sales or 0), 2)
+    data["monthly_sales"] = monthly
+    data["sales_data"] = [
+        {"month": month, "sales": monthly[month]} for month in sorted(monthly)[-SALES_MONTHS_DISPLAYED:]
+    ]
+
+    next_month = (timezone.localdate().replace(day=1) + timedelta(days=32)).replace(day=1)
+    # Monthly sales are revenue, so project the most recently run revenue forecast.
+    forecasts = SalesForecast.objects.filter(period="Monthly", measure="revenue", forecast_date=next_month)
+    method = forecasts.order_by("-created_at").values_list("method", flat=True).first()
+    projected = forecasts.filter(method=method).aggregate(total=Sum("predicted_sales"))["total"]
+    data["projected_sales"] = float(projected) if projected is not None else None
+
+
+def _full_at_risk_pool():
+    return [
+        [pk, float(score)]
+        for pk, score in Customer.objects.filter(churn_score__isnull=False)
+        .order_by("-churn_score", "id")
+        .values_list("id", "churn_score")[:AT_RISK_POOL]
+    ]
+
+
+def _refresh_churn(data, full):
+    after, up_to = _advance(PREDICTIONS_WATERMARK, ChurnPrediction, full)
+    pool = data.get("at_risk_pool")
+    if full or pool is None:
+        pool = _full_at_risk_pool()
+    elif up_to > after:
+        # Every customer outside the pool scored at most the pool's lowest score.
+        floor = pool[-1][1] if len(pool) >= AT_RISK_POOL else 0.0
+        scores = dict((pk, score) for pk, score in pool)
+        for pk, probability in (
+            ChurnPrediction.objects.filter(id__gt=after, id__lte=up_to)
+            .order_by("id")
+            .values_list("customer_id", "churn_probability")
+            .iterator(chunk_size=10_000)
+        ):
+            scores[pk] = round(probability, 2)
+        pool = [list(item) for item in heapq.nsmallest(AT_RISK_POOL, scores.items(), key=lambda item: (-item[1], item[0]))]
+        # If updated customers dropped below the old floor, an unseen customer may now rank higher.
+        if pool and pool[-1][1] < floor:
+            pool = _full_at_risk_pool()
+    data["at_risk_pool"] = pool
+
+    top_ids = [pk for pk, _ in pool[:AT_RISK_DISPLAYED]]
+    customers = Customer.objects.select_related("segment").only(
+        "first_name", "last_name", "segment__name"
+    ).in_bulk(top_ids)
+    data["churn_customers"] = [
+        {
+            "customer_id": pk,
+            "name": f"{customers[pk].first_name} {customers[pk].last_name}",
+            "churn_score": score,
+            "segment": customers[pk].segment.name if customers[pk].segment else None,
+        }
+        for pk, score in pool[:AT_RISK_DISPLAYED]
+        if pk in customers
+    ]
+
+    by_segment = (
+        Customer.objects.filter(churn_score__isnull=False)
+        .values("segment__name")
+        .annotate(total=Count("id"), at_risk=Count("id", filter=Q(churn_score__gte=AT_RISK_THRESHOLD)))
+    )
+    totals = sum(row["total"] for row in by_segment)
+    at_risk = sum(row["at_risk"] for row in by_segment)
+    data["churn_rate"] = round(at_risk / totals * 100, 1) if totals else None
+    data["at_risk_by_segment"] = {
+        row["segment__name"] or "Unsegmented": row["at_risk"] for row in by_segment if row["at_risk"]
+    }
+
+
+def _refresh_recommendations(data):
+    index = recommendation_index.get()
+    if index is None:
+        data["recommended_products"] = []
+        return
+    # How strongly each product is recommended across the catalogue.
+    neighbors, scores = index["neighbors"].ravel(), index["scores"].ravel()
+    valid = neighbors >= 0
+    centrality = np.bincount(neighbors[valid], weights=scores[valid], minlength=len(index["product_ids"]))
+    best = [
+        (int(index["product_ids"][i]), round(float(centrality[i]), 2))
+        for i in np.argsort(-centrality)[:RECOMMENDATIONS_DISPLAYED]
+        if centrality[i] > 0
+    ]
+    names = dict(Product.objects.filter(id__in=[pk for pk, _ in best]).values_list("id", "name"))
+    data["recommended_products"] = [
+        {"product_id": pk, "name": names.get(pk), "score": score} for pk, score in best
+    ]
+
+
+def refresh_dashboard(full=False):
+    """
+    Brings the dashboard snapshot up to date. ``full`` recomputes everything
+    from scratch (e.g. after orders were cancelled or scores bulk-reset).
+
+    Returns:
+        DashboardSnapshot: The refreshed snapshot.
+    """
+    started = time.perf_counter()
+    with transaction.atomic():
+        snapshot = DashboardSnapshot.objects.select_for_update().filter(name=SNAPSHOT_NAME).first()
+        if snapshot is None:
+            snapshot, full = DashboardSnapshot(name=SNAPSHOT_NAME, data={}), True
+        data = snapshot.data
+
+        _refresh_sales(data, full)
+        _refresh_churn(data, full)
+        _refresh_recommendations(data)
+        data["totals"] = {
+            "customers": Customer.objects.count(),
+            "orders": Order.objects.count(),
+            "products": Product.objects.count(),
+        }
+
+        snapshot.refreshed_at = timezone.now()
+        snapshot.save()
+    print(f"✅ Dashboard snapshot refreshed ({'full' if full else 'incremental'}) in {time.perf_counter() - started:.2f}s.")
+    return snapshot
+
+
+def dashboard_context():
+    """
+    Template context for the dashboard page, read from the stored snapshot.
+    """
+    snapshot = DashboardSnapshot.objects.filter(name=SNAPSHOT_NAME).first()
+    if snapshot is None:
+        return {"snapshot_missing": True}
+    data = snapshot.data
+    return {
+        "churn_customers": data.get("churn_customers", []),
+        "sales_data": data.get("sales_data", []),
+        "recommended_products": data.get("recommended_products", []),
+        "churn_rate": data.get("churn_rate"),
+        "projected_sales": data.get("projected_sales"),
+        "at_risk_by_segment": data.get("at_risk_by_segment", {}),
+        "totals": data.get("totals", {}),
+        "refreshed_at": snapshot.refreshed_at,
+        "is_stale": timezone.now() - snapshot.refreshed_at > STALE_AFTER,
+    }
@@ -0,0 +1,122 @@
+import csv
+import io
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ChurnPrediction, Customer, Order, OrderItem
+
+# --------------------------
+# Streaming Bulk Exports
+# --------------------------
+# Rows are read with values_list().iterator(chunk_size=...), so the database
+# driver streams them (server-side cursors where supported) and no model
+# instances are built. Output is produced in ~64 KiB blocks as rows arrive,
+# optionally through an incremental gzip compressor, so memory stays flat and
+# the first bytes go out as soon as the first rows are read.
+
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+_BLOCK_SIZE = 64 * 1024
+
+# Dataset name -> (queryset factory, exported fields).
+DATASETS = {
+    "customers": (
+        lambda: Customer.objects.all(),
+        ("id", "first_name", "last_name", "email", "phone", "registration_date",
+         "last_purchase_date", "churn_score", "segment__name"),
+    ),
+    "orders": (
+        lambda: Order.objects.all(),
+        ("id", "order_number", "customer_id", "order_date", "total_amount", "status"),
+    ),
+    "order-items": (
+        lambda: OrderItem.objects.all(),
+        ("id", "order_id", "order__order_number", "product_id", "product__asin", "quantity", "price_at_purchase"),
+    ),
+    "churn-predictions": (
+        lambda: ChurnPrediction.objects.all(),
+        ("id", "customer_id", "churn_probability", "prediction_date"),
+    ),
+}
+
+
+def column_names(dataset):
+    return [field.replace("__", "_") for field in DATASETS[dataset][1]]
+
+
+def iter_rows(dataset, chunk_size=DEFAULT_EXPORT_CHUNK_SIZE):
+    queryset, fields = DATASETS[dataset]
+    return queryset().order_by("id").values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def _blocks(lines):
+    """
+    Joins text lines into ~64 KiB UTF-8 blocks.
+    """
+    buffer = io.StringIO()
+    for line in lines:
+        buffer.write(line)
+        if buffer.tell() >= _BLOCK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer = io.StringIO()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_csv(dataset, chunk_size=DEFAULT_EXPORT_CHUNK_SIZE):
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    def lines():
+        writer.writerow(column_names(dataset))
+        yield _take(line)
+        for row in iter_rows(dataset, chunk_size):
+            writer.writerow(row)
+            yield _take(line)
+
+    return _blocks(lines())
+
+
+def _take(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
+
+
+def iter_ndjson(dataset, chunk_size=DEFAULT_EXPORT_CHUNK_SIZE):
+    columns = column_names(dataset)
+    encoder = DjangoJSONEncoder()
+    return _blocks(
+        encoder.encode(dict(zip(columns, row))) + "\n"
+        for row in iter_rows(dataset, chunk_size)
+    )
+
+
+FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
+
+
+def gzip_stream(blocks):
+    """
+    Compresses a stream of byte blocks into one gzip file, flushing after each
+    block so every block reaches the client as soon as it is produced.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for block in blocks:
+        yield compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def export_stream(dataset, export_format="csv", compress=False, chunk_size=DEFAULT_EXPORT_CHUNK_SIZE):
+    """
+    Returns an iterator of byte blocks exporting ``dataset`` in ``export_format``.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}', expected one of {sorted(DATASETS)}.")
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown format '{export_format}', expected one of {sorted(FORMATS)}.")
+    blocks = FORMATS[export_format][0](dataset, chunk_size)
+    return gzip_stream(blocks) if compress else blocks
@@ -0,0 +1,37 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    Stores a JSON-serialisable value as zlib-compressed JSON. Scraped payloads
+    (photo lists, variations, specification tables) shrink several-fold, at
+    the cost of not being queryable in SQL.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(bytes(value)))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        compressed = zlib.compress(json.dumps(value, cls=DjangoJSONEncoder).encode("utf-8"))
+        return super().get_db_prep_value(compressed, connection, prepared)
+
+    def to_python(self, value):
+        # Serialized fixtures hold the JSON text (see value_to_string).
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj), cls=DjangoJSONEncoder)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from crm.ml_models import backfill_sales_volume_units, DEFAULT_CHUNK_SIZE
+
+class Command(BaseCommand):
+    help = "Parses Product.sales_volume into the numeric sales_volume_units column for all products."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Number of products parsed and written per batch."
+        )
+
+    def handle(self, *args, **options):
+        backfill_sales_volume_units(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS("Sales volume backfill completed."))
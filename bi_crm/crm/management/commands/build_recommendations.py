@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from crm.recommendations import (
+    build_recommendation_index, compact_recommendation_index, update_recommendation_index, DEFAULT_TOP_K
+)
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the item-item product recommendation index from order history, "
+        "or applies only the orders placed since the last run with --incremental."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k", type=int, default=DEFAULT_TOP_K,
+            help="Number of most similar products kept per product (full rebuilds only)."
+        )
+        parser.add_argument(
+            "--incremental", action="store_true",
+            help="Fold new order items into the existing index instead of rebuilding it."
+        )
+        parser.add_argument(
+            "--compact", action="store_true",
+            help="Merge the co-occurrence deltas left by incremental runs into the base matrix."
+        )
+
+    def handle(self, *args, **options):
+        if options["incremental"]:
+            products = update_recommendation_index()
+            self.stdout.write(self.style.SUCCESS(f"Recommendation index updated, {products} products re-ranked."))
+        elif options["compact"]:
+            compact_recommendation_index()
+            self.stdout.write(self.style.SUCCESS("Recommendation deltas compacted."))
+        else:
+            products = build_recommendation_index(top_k=options["top_k"])
+            self.stdout.write(self.style.SUCCESS(f"Recommendation index rebuilt for {products} products."))
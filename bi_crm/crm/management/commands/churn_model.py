@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm import model_registry
+from crm.caching import invalidate
+from crm.ml_models import CHURN_MODEL_NAME, train_and_register_churn_model
+
+class Command(BaseCommand):
+    help = "Manages versions of the churn prediction model: train, list, pin or roll back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["train", "list", "pin", "rollback"])
+        parser.add_argument("version", nargs="?", type=int, help="Version to pin (for 'pin').")
+        parser.add_argument(
+            "--no-activate", action="store_true",
+            help="Register the trained model without making it the current version."
+        )
+
+    def handle(self, *args, **options):
+        action = options["action"]
+
+        if action == "train":
+            version = train_and_register_churn_model(activate=not options["no_activate"])
+            if version is None:
+                raise CommandError("Not enough data to train the model.")
+            self.stdout.write(self.style.SUCCESS(f"Registered churn model version {version}."))
+
+        elif action == "list":
+            current = model_registry.current_version(CHURN_MODEL_NAME)
+            versions = model_registry.list_versions(CHURN_MODEL_NAME)
+            if not versions:
+                self.stdout.write(self.style.WARNING("No churn model versions registered."))
+            for version in versions:
+                artifact = model_registry.load_model(CHURN_MODEL_NAME, version)
+                metrics = ", ".join(f"{k}={v:.4f}" for k, v in artifact.get("metrics", {}).items())
+                marker = "*" if version == current else " "
+                self.stdout.write(f"{marker} v{version}  {artifact.get('created_at', '')}  {metrics}")
+
+        elif action == "pin":
+            if options["version"] is None:
+                raise CommandError("Specify the version to pin.")
+            try:
+                model_registry.set_current_version(CHURN_MODEL_NAME, options["version"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            invalidate("churn_model")
+            self.stdout.write(self.style.SUCCESS(f"Pinned churn model version {options['version']}."))
+
+        elif action == "rollback":
+            try:
+                version = model_registry.rollback(CHURN_MODEL_NAME)
+            except ValueError as e:
+                raise CommandError(str(e))
+            invalidate("churn_model")
+            self.stdout.write(self.style.SUCCESS(f"Rolled back churn model to version {version}."))
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from crm.pricing import compact_price_history, DEFAULT_COMPACTION_BATCH_SIZE, RESOLUTIONS
+
+class Command(BaseCommand):
+    help = (
+        "Downsamples PriceHistory older than the retention window to hourly or daily "
+        "resolution and drops consecutive duplicate prices, deleting in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days", type=int, default=settings.PRICE_HISTORY_RETENTION_DAYS,
+            help="Days of price history kept at full resolution."
+        )
+        parser.add_argument(
+            "--resolution", choices=RESOLUTIONS, default="hourly",
+            help="Resolution older price history is downsampled to."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_COMPACTION_BATCH_SIZE,
+            help="Number of rows deleted per transaction."
+        )
+        parser.add_argument(
+            "--pause", type=float, default=0.0,
+            help="Seconds to sleep between delete batches to let other writers in."
+        )
+
+    def handle(self, *args, **options):
+        if options["keep_days"] < 0:
+            raise CommandError("--keep-days must not be negative.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        result = compact_price_history(
+            keep_days=options["keep_days"], resolution=options["resolution"],
+            batch_size=options["batch_size"], pause=options["pause"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Price history compaction completed ({result['deleted']} rows deleted)."))
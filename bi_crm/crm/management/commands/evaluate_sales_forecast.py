@@ -1,49 +1,66 @@
-import math
-import re
-from django.core.management.base import BaseCommand
-from crm.models import Product
-from crm.ml_models import forecast_sales_for_product
+from django.core.management.base import BaseCommand, CommandError
+from crm.backtesting import backtest_sales_forecasts
+from crm.forecasting import DEFAULT_SALES_MEASURE, FORECAST_METHODS, PERIOD_TRUNCATORS, SALES_MEASURES
+from crm.ml_models import DEFAULT_CHUNK_SIZE
 
 class Command(BaseCommand):
-    help = "Evaluates the sales forecast model on product data using MAE, RMSE, and MAPE."
+    help = "Backtests stored sales forecasts against realised order sales using MAE, RMSE, and MAPE."
 
-    def handle(self, *args, **options):
-        products = Product.objects.all()
-        if not products.exists():
-            self.stdout.write(self.style.ERROR("No product data available to evaluate."))
-            return
-
-        errors = []
-        percentage_errors = []
-
-        self.stdout.write("Evaluating sales forecast for each product...\n")
+    def add_arguments(self, parser):
+        parser.add_argument("--period", choices=sorted(PERIOD_TRUNCATORS), default="Monthly")
+        parser.add_argument(
+            "--method", choices=["sentiment"] + sorted(FORECAST_METHODS), default="sentiment",
+            help="Forecasting method whose stored forecasts are evaluated."
+        )
+        parser.add_argument(
+            "--measure", choices=sorted(SALES_MEASURES), default=DEFAULT_SALES_MEASURE,
+            help="Forecast measure to evaluate, compared against units sold or revenue."
+        )
+        parser.add_argument(
+            "--windows", type=int, default=6,
+            help="Number of most recent completed periods to evaluate (one rolling-origin window each)."
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Number of product chunks evaluated in parallel.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Number of products per evaluation chunk."
+        )
 
-        for product in products:
-            # Get forecast data using our sales forecast function.
-            forecast_data = forecast_sales_for_product(product)
-            base_sales = forecast_data.get("base_sales", 0)
-            forecasted_sales = forecast_data.get("forecasted_sales", 0)
-            error = abs(forecasted_sales - base_sales)
-            errors.append(error)
-
-            # Only calculate percentage error if base_sales > 0 to avoid division by zero.
-            if base_sales > 0:
-                percentage_errors.append((error / base_sales) * 100)
+    def handle(self, *args, **options):
+        for option in ("windows", "workers", "chunk_size"):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1.")
+        result = backtest_sales_forecasts(
+            period=options["period"],
+            windows=options["windows"],
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            method=options["method"],
+            measure=options["measure"],
+        )
+        overall = result["overall"]
+        if not overall["count"]:
+            raise CommandError("No stored forecasts fall inside the evaluated windows.")
 
-            self.stdout.write(
-                f"{product.name} (ASIN: {product.asin}): Base Sales = {base_sales}, "
-                f"Forecast = {forecasted_sales:.2f}, Error = {error:.2f}"
-            )
+        self.stdout.write(
+            f"Backtesting {options['period'].lower()} {options['method']} {options['measure']} forecasts...\n"
+        )
+        for window in result["windows"]:
+            if window["count"]:
+                mape = f"{window['mape']:.2f}%" if window["mape"] is not None else "n/a"
+                self.stdout.write(
+                    f"{window['period_start']}: n = {window['count']}, MAE = {window['mae']:.2f}, "
+                    f"RMSE = {window['rmse']:.2f}, MAPE = {mape}"
+                )
+            else:
+                self.stdout.write(f"{window['period_start']}: no forecasts")
 
-        if errors:
-            mae = sum(errors) / len(errors)
-            rmse = math.sqrt(sum(e ** 2 for e in errors) / len(errors))
-            mape = sum(percentage_errors) / len(percentage_errors) if percentage_errors else None
+        self.stdout.write("\n" + self.style.SUCCESS("Evaluation Metrics:"))
+        self.stdout.write(f"MAE  : {overall['mae']:.2f}")
+        self.stdout.write(f"RMSE : {overall['rmse']:.2f}")
+        if overall["mape"] is not None:
+            self.stdout.write(f"MAPE : {overall['mape']:.2f}%")
 
-            self.stdout.write("\n" + self.style.SUCCESS("Evaluation Metrics:"))
-            self.stdout.write(f"MAE  : {mae:.2f}")
-            self.stdout.write(f"RMSE : {rmse:.2f}")
-            if mape is not None:
-                self.stdout.write(f"MAPE : {mape:.2f}%")
-        else:
-            self.stdout.write(self.style.WARNING("No errors computed, check the product data."))
+        self.stdout.write("\nTiming breakdown:")
+        for stage, seconds in result["timings"].items():
+            self.stdout.write(f"  {stage:<16}: {seconds:.3f}s")
@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from crm.exports import export_stream, DATASETS, DEFAULT_EXPORT_CHUNK_SIZE, FORMATS
+
+class Command(BaseCommand):
+    help = "Streams a dataset (customers, orders, order-items, churn-predictions) to a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv", dest="export_format")
+        parser.add_argument("--gzip", action="store_true", help="Gzip-compress the output.")
+        parser.add_argument(
+            "--output", default="-",
+            help="File to write to, or '-' for standard output (the default)."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_EXPORT_CHUNK_SIZE,
+            help="Number of rows fetched from the database at a time."
+        )
+
+    def handle(self, *args, **options):
+        blocks = export_stream(
+            options["dataset"], options["export_format"], options["gzip"], chunk_size=options["chunk_size"]
+        )
+        if options["output"] == "-":
+            for block in blocks:
+                sys.stdout.buffer.write(block)
+            sys.stdout.buffer.flush()
+            return
+
+        written = 0
+        with open(options["output"], "wb") as output:
+            for block in blocks:
+                output.write(block)
+                written += len(block)
+        self.stdout.write(self.style.SUCCESS(f"Exported {options['dataset']} to {options['output']} ({written:,} bytes)."))
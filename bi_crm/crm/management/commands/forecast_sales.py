@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm.forecasting import DEFAULT_SALES_MEASURE, FORECAST_METHODS, PERIOD_TRUNCATORS, SALES_MEASURES, forecast_timeseries
+from crm.ml_models import forecast_and_store_sales, DEFAULT_CHUNK_SIZE
+
+class Command(BaseCommand):
+    help = "Computes sales forecasts for all products and stores them in SalesForecast."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method", choices=["sentiment"] + sorted(FORECAST_METHODS), default="sentiment",
+            help="'sentiment' scales scraped sales volume by review sentiment; the others are "
+                 "time-series models fitted to order history."
+        )
+        parser.add_argument("--period", choices=sorted(PERIOD_TRUNCATORS),
+                            help="Period the forecasts are stored under (default: Monthly for the "
+                                 "sentiment method, Weekly for the time-series methods).")
+        parser.add_argument("--horizon", type=int, default=4, help="Number of future periods to forecast.")
+        parser.add_argument("--history", type=int, default=104, help="Number of past periods to fit on.")
+        parser.add_argument("--measure", choices=sorted(SALES_MEASURES), default=DEFAULT_SALES_MEASURE,
+                            help="Time-series target: units (quantity) or revenue (quantity x price). "
+                                 "The sentiment method always forecasts units.")
+        parser.add_argument(
+            "--workers", type=int,
+            help="Number of worker processes for sentiment analysis (default: one per CPU core)."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Number of products processed and written per batch."
+        )
+
+    def handle(self, *args, **options):
+        for option in ("horizon", "history", "chunk_size"):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1.")
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+        if options["method"] == "sentiment":
+            if options["measure"] != "quantity":
+                raise CommandError("The sentiment method forecasts units; use --measure quantity.")
+            forecast_and_store_sales(
+                chunk_size=options["chunk_size"], workers=options["workers"], period=options["period"] or "Monthly",
+            )
+        else:
+            forecast_timeseries(
+                method=options["method"],
+                period=options["period"] or "Weekly",
+                horizon=options["horizon"],
+                history=options["history"],
+                measure=options["measure"],
+                batch_size=options["chunk_size"],
+            )
+        self.stdout.write(self.style.SUCCESS("Sales forecast updated for all products."))
@@ -1,9 +1,17 @@
-from django.core.management.base import BaseCommand
-from crm.ml_models import generate_initial_churn_scores
+from django.core.management.base import BaseCommand, CommandError
+from crm.ml_models import generate_initial_churn_scores, DEFAULT_CHUNK_SIZE
 
 class Command(BaseCommand):
     help = "Updates churn scores for all customers"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Number of customers scored and written per batch."
+        )
+
     def handle(self, *args, **kwargs):
-        generate_initial_churn_scores()
+        if kwargs["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        generate_initial_churn_scores(chunk_size=kwargs["chunk_size"])
         self.stdout.write(self.style.SUCCESS("✅ Churn scores updated successfully!"))
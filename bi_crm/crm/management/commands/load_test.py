@@ -0,0 +1,146 @@
+import asyncio
+import itertools
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = [
+    "api/customers/",
+    "customers/1/",
+    "churn-prediction/?customer_id=1",
+    "sales-forecast/?product_id=1",
+    "recommendations/?customer_id=1",
+    "pricing-insights/?product_id=1",
+]
+
+
+async def _read_headers(reader):
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+    return headers
+
+
+async def _read_chunked(reader):
+    while size := int((await reader.readline()).split(b";")[0], 16):
+        await reader.readexactly(size + 2)  # The chunk and its CRLF.
+    await _read_headers(reader)  # Trailers.
+
+
+async def _get(reader, writer, host, target):
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode("ascii"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = await _read_headers(reader)
+    keep_alive = headers.get("connection") != "close"
+    if "chunked" in headers.get("transfer-encoding", ""):
+        await _read_chunked(reader)
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif not keep_alive:
+        await reader.read()  # The body runs until the server closes the connection.
+    return status, keep_alive
+
+
+async def run_load(base_url, paths, concurrency, total, bust_cache=False):
+    """
+    Sends ``total`` GET requests over ``concurrency`` keep-alive connections,
+    cycling through ``paths`` under ``base_url``.
+
+    Returns:
+        dict: ``requests``, ``errors``, ``seconds``, ``rps`` and latency
+        percentiles ``p50``/``p95``/``p99`` in milliseconds.
+    """
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    prefix = url.path.rstrip("/") + "/"
+    sequence = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        connection = None
+        while (n := next(sequence)) < total:
+            target = prefix + paths[n % len(paths)]
+            if bust_cache:
+                target += ("&" if "?" in target else "?") + f"_={n}"
+            started = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection(host, port)
+                status, keep_alive = await _get(*connection, url.netloc, target)
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                errors += 1
+                if connection is not None:
+                    connection[1].close()
+                connection = None
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+            if not keep_alive:
+                connection[1].close()
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if latencies else (None,) * 3
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the sync views (served by a WSGI server) against their async variants "
+        "(served by an ASGI server) and reports throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sync-url", default="http://127.0.0.1:8000/",
+            help="Base URL of the sync views, e.g. under 'gunicorn bi_crm.wsgi'."
+        )
+        parser.add_argument(
+            "--async-url", default="http://127.0.0.1:8001/async/",
+            help="Base URL of the async views, e.g. under 'uvicorn bi_crm.asgi:application'."
+        )
+        parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS, help="Paths requested in turn.")
+        parser.add_argument("--concurrency", type=int, default=200, help="Concurrent connections.")
+        parser.add_argument("--requests", type=int, default=5000, help="Total requests per server.")
+        parser.add_argument(
+            "--bust-cache", action="store_true",
+            help="Add a unique query parameter to every request so the response cache is bypassed."
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive.")
+
+        self.stdout.write(f"{'server':<8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for label in ("sync", "async"):
+            result = asyncio.run(run_load(
+                options[f"{label}_url"], options["paths"], options["concurrency"], options["requests"],
+                bust_cache=options["bust_cache"],
+            ))
+            if not result["requests"]:
+                raise CommandError(f"No successful responses from {options[f'{label}_url']}; is the server running?")
+            self.stdout.write(
+                f"{label:<8}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.0f}"
+                f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS("Load test finished."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from crm.dashboard import refresh_dashboard
+
+class Command(BaseCommand):
+    help = "Refreshes the precomputed dashboard snapshot from data added since the last refresh."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Recompute every figure from scratch instead of incrementally."
+        )
+
+    def handle(self, *args, **options):
+        snapshot = refresh_dashboard(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Dashboard snapshot refreshed at {snapshot.refreshed_at:%Y-%m-%d %H:%M:%S}."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm.pricing import rebuild_price_rollups, rollup_price_history, DEFAULT_ROLLUP_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = "Folds new PriceHistory rows into the daily price rollup used for pricing insights."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_ROLLUP_BATCH_SIZE,
+            help="Number of PriceHistory rows merged per transaction."
+        )
+        parser.add_argument(
+            "--rebuild", action="store_true",
+            help="Drop the rollups and re-aggregate them from price history. Days already thinned "
+                 "by compact_price_history keep their rollups."
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options["rebuild"]:
+            merged = rebuild_price_rollups(batch_size=options["batch_size"])
+        else:
+            merged = rollup_price_history(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Price rollup completed ({merged} observations merged)."))
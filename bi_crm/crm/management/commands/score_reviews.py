@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm.review_sentiment import DEFAULT_REVIEW_CHUNK_SIZE, score_reviews
+
+class Command(BaseCommand):
+    help = "Scores the sentiment of reviews created or edited since the last run and updates product means."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_REVIEW_CHUNK_SIZE,
+            help="Reviews read, scored and written per transaction."
+        )
+        parser.add_argument("--workers", type=int, help="Scoring processes (default: one per core).")
+        parser.add_argument(
+            "--rescore", action="store_true",
+            help=(
+                "Score every review from scratch instead of only new and edited ones. Incremental runs "
+                "do not see deleted reviews; this also refreshes the means of products that lost reviews."
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+        scored = score_reviews(
+            chunk_size=options["chunk_size"], workers=options["workers"], rescore=options["rescore"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Scored {scored} reviews."))
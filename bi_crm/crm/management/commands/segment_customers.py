@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm.segmentation import DEFAULT_CLUSTERS, DEFAULT_SEGMENTATION_CHUNK_SIZE, METHODS, segment_customers
+
+class Command(BaseCommand):
+    help = "Assigns customers to RFM (recency, frequency, monetary) segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method", choices=METHODS,
+            help="Rule-based RFM quintiles (the default) or MiniBatchKMeans clusters. Incremental runs "
+                 "reuse the fitted method and reject a different one."
+        )
+        parser.add_argument(
+            "--clusters", type=int,
+            help=f"Number of k-means clusters (default {DEFAULT_CLUSTERS}). Incremental runs reject a different count."
+        )
+        parser.add_argument(
+            "--incremental", action="store_true",
+            help="Only re-segment customers with orders placed since the last run, reusing the last fitted binning."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_SEGMENTATION_CHUNK_SIZE,
+            help="Rows streamed, clustered and written per chunk."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = segment_customers(
+                method=options["method"], clusters=options["clusters"],
+                incremental=options["incremental"], chunk_size=options["chunk_size"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Segmented {result['customers']} customers, {result['changed']} changed segment."
+        ))
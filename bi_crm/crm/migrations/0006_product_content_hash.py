@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0005_alter_salesforecast_forecast_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0006_product_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='last_fetched_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
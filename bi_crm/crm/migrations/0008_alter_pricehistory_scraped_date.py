@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0007_product_last_fetched_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pricehistory',
+            name='scraped_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
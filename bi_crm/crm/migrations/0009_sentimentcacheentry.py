@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0008_alter_pricehistory_scraped_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentimentCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('polarity', models.FloatField()),
+                ('subjectivity', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
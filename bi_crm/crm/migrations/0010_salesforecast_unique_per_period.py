@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:19
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_forecasts(apps, schema_editor):
+    """Keep only the most recent row for each (product, forecast_date, period)."""
+    SalesForecast = apps.get_model('crm', 'SalesForecast')
+    latest_ids = (
+        SalesForecast.objects.values('product', 'forecast_date', 'period')
+        .annotate(latest_id=Max('id'))
+        .values_list('latest_id', flat=True)
+    )
+    SalesForecast.objects.exclude(id__in=list(latest_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0009_sentimentcacheentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_forecasts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='salesforecast',
+            constraint=models.UniqueConstraint(fields=('product', 'forecast_date', 'period'), name='unique_sales_forecast_per_period'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0010_salesforecast_unique_per_period'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sales_volume_units',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0011_product_sales_volume_units'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPriceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('Amazon', 'Amazon'), ('Flipkart', 'Flipkart'), ('Other', 'Other')], max_length=20)),
+                ('date', models.DateField()),
+                ('open_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('high_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('low_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price_sum', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('sample_count', models.PositiveIntegerField()),
+                ('first_seen_at', models.DateTimeField()),
+                ('last_seen_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pricehistory',
+            index=models.Index(fields=['product', 'scraped_date'], name='pricehistory_product_date'),
+        ),
+        migrations.AddField(
+            model_name='dailypricerollup',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_prices', to='crm.product'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailypricerollup',
+            constraint=models.UniqueConstraint(fields=('product', 'platform', 'date'), name='unique_daily_price_rollup'),
+        ),
+    ]
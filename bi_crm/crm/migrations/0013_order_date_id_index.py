@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0012_daily_price_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_date', 'id'], name='order_date_id'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0013_order_date_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('data', models.JSONField(default=dict)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
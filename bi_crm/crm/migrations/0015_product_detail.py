@@ -0,0 +1,111 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:39
+
+import crm.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+DETAIL_FIELDS = [
+    'description', 'customers_say', 'product_information', 'product_details', 'product_photos',
+    'product_videos', 'category_path', 'product_variations', 'more_info',
+]
+BATCH_SIZE = 500
+
+
+def _product_batches(Product, fields):
+    # Keyset over the primary key, so memory stays bounded however large the catalogue is.
+    last_id = 0
+    while True:
+        rows = list(Product.objects.filter(id__gt=last_id).order_by('id').values('id', *fields)[:BATCH_SIZE])
+        if not rows:
+            return
+        last_id = rows[-1]['id']
+        yield rows
+
+
+def copy_details(apps, schema_editor):
+    Product = apps.get_model('crm', 'Product')
+    ProductDetail = apps.get_model('crm', 'ProductDetail')
+    for rows in _product_batches(Product, DETAIL_FIELDS):
+        ProductDetail.objects.bulk_create(
+            [ProductDetail(product_id=row.pop('id'), **row) for row in rows]
+        )
+
+
+def restore_details(apps, schema_editor):
+    Product = apps.get_model('crm', 'Product')
+    ProductDetail = apps.get_model('crm', 'ProductDetail')
+    last_id = 0
+    while True:
+        details = list(ProductDetail.objects.filter(product_id__gt=last_id).order_by('product_id')[:BATCH_SIZE])
+        if not details:
+            return
+        Product.objects.bulk_update(
+            [
+                Product(id=detail.product_id, **{name: getattr(detail, name) for name in DETAIL_FIELDS})
+                for detail in details
+            ],
+            DETAIL_FIELDS,
+        )
+        last_id = details[-1].product_id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0014_dashboard_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDetail',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='detail', serialize=False, to='crm.product')),
+                ('description', models.TextField(blank=True, null=True)),
+                ('customers_say', models.TextField(blank=True, null=True)),
+                ('product_information', crm.fields.CompressedJSONField(blank=True, null=True)),
+                ('product_details', crm.fields.CompressedJSONField(blank=True, null=True)),
+                ('product_photos', crm.fields.CompressedJSONField(blank=True, null=True)),
+                ('product_videos', crm.fields.CompressedJSONField(blank=True, null=True)),
+                ('category_path', crm.fields.CompressedJSONField(blank=True, null=True)),
+                ('product_variations', crm.fields.CompressedJSONField(blank=True, null=True)),
+                ('more_info', crm.fields.CompressedJSONField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(copy_details, restore_details),
+        migrations.RemoveField(
+            model_name='product',
+            name='category_path',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='customers_say',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='description',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='more_info',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='product_details',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='product_information',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='product_photos',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='product_variations',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='product_videos',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0015_product_detail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobwatermark',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_sentiment',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['updated_at', 'id'], name='review_updated_id'),
+        ),
+    ]
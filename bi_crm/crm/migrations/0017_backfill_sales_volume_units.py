@@ -0,0 +1,50 @@
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# Frozen copy of crm.ml_models.SALES_VOLUME_PATTERN, so this migration keeps
+# its meaning if the parser changes later.
+SALES_VOLUME_RE = re.compile(r'(?P<number>\d[\d,]*(?:\.\d+)?)(?:(?P<suffix>[KkMm])(?![A-Za-z]))?')
+SALES_VOLUME_MULTIPLIERS = {'K': 1_000, 'M': 1_000_000}
+
+
+def parse_sales_volume(text):
+    match = SALES_VOLUME_RE.search(text or '')
+    if not match:
+        return None
+    number = float(match.group('number').replace(',', ''))
+    return int(number * SALES_VOLUME_MULTIPLIERS.get((match.group('suffix') or '').upper(), 1))
+
+
+def backfill_units(apps, schema_editor):
+    # Fills the column for products stored before 0011 and corrects values
+    # parsed with the earlier pattern, which let "5 months" read as 5M.
+    Product = apps.get_model('crm', 'Product')
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'sales_volume', 'sales_volume_units')[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        changed = [
+            Product(id=pk, sales_volume_units=units)
+            for pk, text, stored in rows
+            if (units := parse_sales_volume(text)) != stored
+        ]
+        Product.objects.bulk_update(changed, ['sales_volume_units'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0016_review_sentiment'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_units, migrations.RunPython.noop),
+    ]
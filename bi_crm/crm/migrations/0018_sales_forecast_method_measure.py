@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0017_backfill_sales_volume_units'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='salesforecast',
+            name='unique_sales_forecast_per_period',
+        ),
+        migrations.AddField(
+            model_name='salesforecast',
+            name='measure',
+            field=models.CharField(default='quantity', help_text='What is forecast: quantity (units) or revenue', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='salesforecast',
+            name='method',
+            field=models.CharField(default='sentiment', help_text='Model that produced the forecast (e.g., sentiment, holt, seasonal-naive)', max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='salesforecast',
+            constraint=models.UniqueConstraint(fields=('product', 'forecast_date', 'period', 'method', 'measure'), name='unique_sales_forecast_per_method'),
+        ),
+    ]
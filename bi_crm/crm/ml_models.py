@@ -1,38 +1,106 @@
-import random
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 import re
-from textblob import TextBlob
+from asgiref.sync import sync_to_async
 from django.utils.timezone import now
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import StandardScaler
-from .models import Customer
+from .models import Customer, ChurnPrediction, Product, ProductDetail, SalesForecast
+from . import model_registry
+from .caching import invalidate
+from .sentiment import analyze_sentiment, sentiment_cache
+from .utils import LRUCache
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
 
+# Registry name and feature order of the persisted churn model.
+CHURN_MODEL_NAME = "churn"
+CHURN_FEATURES = ["tenure", "last_purchase_gap"]
+
+# Default number of rows pulled from the database per round trip by the bulk jobs.
+DEFAULT_CHUNK_SIZE = 5000
+
+# --------------------------
+# Bulk Helpers
+# --------------------------
+def iter_value_chunks(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streams a queryset as lists of ``values_list`` tuples, ``chunk_size`` rows at a time.
+
+    Uses keyset pagination on the primary key rather than OFFSET or a server-side
+    cursor, so memory stays bounded and it is safe to write back to the same table
+    between chunks. The first entry of ``fields`` must be the primary key.
+    """
+    last_pk = None
+    while True:
+        page = queryset.order_by(fields[0])
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        rows = list(page.values_list(*fields)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def days_since(dates, today, default):
+    """
+    Vectorised ``(today - date).days`` for a sequence of dates (``None`` allowed).
+    Missing dates are replaced by ``default``.
+    """
+    values = np.array(dates, dtype="datetime64[D]")
+    missing = np.isnat(values)
+    days = (np.datetime64(today, "D") - values).astype("timedelta64[D]").astype(np.float64)
+    days[missing] = default
+    return days
+
+
 # --------------------------
 # Generate Initial Churn Scores
 # --------------------------
-def generate_initial_churn_scores():
+def generate_initial_churn_scores(chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Assigns an initial churn score to customers based on their behavior.
     This is used to bootstrap the model before real predictions.
+
+    The score ``last_purchase_gap / (tenure + 1) * spending_factor`` is evaluated
+    with NumPy over chunks of ``chunk_size`` customers and written back with
+    ``bulk_update`` on ``churn_score`` only, so memory stays bounded and the
+    ``Customer.save()`` override is not re-run for every row. A missing
+    registration date is treated as a tenure of 0 days and a missing spending
+    factor as neutral (1.0).
     """
-    customers = Customer.objects.all()
+    today = now().date()
+    updated = 0
 
-    for customer in customers:
-        tenure = (now().date() - customer.registration_date).days
-        last_purchase_gap = (now().date() - customer.last_purchase_date).days if customer.last_purchase_date else 365
-        spending_factor = customer.spending_factor  # Simulate spending influence
-        churn_score = min(1, max(0, (last_purchase_gap / (tenure + 1)) * float(spending_factor)))
+    customers = Customer.objects.all()
+    fields = ("id", "registration_date", "last_purchase_date", "spending_factor")
+    for rows in iter_value_chunks(customers, fields, chunk_size):
+        ids, registration_dates, last_purchase_dates, spending_factors = zip(*rows)
 
+        tenure, last_purchase_gap = churn_features(registration_dates, last_purchase_dates, today).T
+        spending_factor = np.array(
+            [1.0 if factor is None else float(factor) for factor in spending_factors]
+        )
+        churn_scores = np.round(np.clip(last_purchase_gap / (tenure + 1) * spending_factor, 0, 1), 2)
 
-        # Update churn score in database
-        customer.churn_score = round(churn_score, 2)
-        customer.save()
+        Customer.objects.bulk_update(
+            [Customer(id=pk, churn_score=float(score)) for pk, score in zip(ids, churn_scores)],
+            ["churn_score"],
+            batch_size=chunk_size,
+        )
+        updated += len(ids)
 
-    print("✅ Initial churn scores assigned to customers.")
+    invalidate("customers")
+    print(f"✅ Initial churn scores assigned to {updated} customers.")
+    return updated
 
 def train_churn_model():
     """
@@ -51,8 +119,8 @@ def train_churn_model():
     # Convert now() to a timezone-naive datetime by removing tzinfo
     now_naive = now().replace(tzinfo=None)
 
-    # Compute tenure (days since registration)
-    df["tenure"] = (pd.Timestamp(now_naive) - df["registration_date"]).dt.days
+    # Compute tenure (days since registration); a missing registration date counts as a new customer
+    df["tenure"] = (pd.Timestamp(now_naive) - df["registration_date"]).dt.days.fillna(0).astype(int)
 
     # Compute last purchase gap (days since last purchase)
     df["last_purchase_gap"] = (pd.Timestamp(now_naive) - df["last_purchase_date"]).dt.days
@@ -62,7 +130,7 @@ def train_churn_model():
     # Encode churn as 0 (low risk) and 1 (high risk)
     df["churn"] = df["churn_score"].apply(lambda x: 1 if x and x > 0.5 else 0)
 
-    X = df[["tenure", "last_purchase_gap"]]
+    X = df[CHURN_FEATURES].to_numpy()
     y = df["churn"]
 
     # Train/Test Split
@@ -80,9 +148,6 @@ def train_churn_model():
     print("✅ Churn model trained successfully.")
     return model, scaler, X_test_scaled, y_test
 
-# Train the model initially
-churn_model, churn_scaler, X_test_scaled, y_test = train_churn_model()
-
 def evaluate_churn_model(model, X_test_scaled, y_test):
     # Get predictions and predicted probabilities
     y_pred = model.predict(X_test_scaled)
@@ -103,82 +168,356 @@ def evaluate_churn_model(model, X_test_scaled, y_test):
     print(f"F1 Score  : {f1:.4f}")
     print(f"ROC-AUC   : {roc_auc:.4f}")
 
-# Evaluate the model if the training was successful
-if churn_model:
-    evaluate_churn_model(churn_model, X_test_scaled, y_test)
+    return {
+        "accuracy": accuracy,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "roc_auc": roc_auc,
+    }
+
+# --------------------------
+# Churn Model Registry
+# --------------------------
+def train_and_register_churn_model(activate=True):
+    """
+    Trains and evaluates a churn model, then saves it to the model registry as a
+    new version (made current unless ``activate`` is False).
 
-def predict_and_update_churn():
+    Returns:
+        int | None: The registered version, or None if there was not enough data.
+    """
+    result = train_churn_model()
+    if result[0] is None:
+        return None
+
+    model, scaler, X_test_scaled, y_test = result
+    metrics = evaluate_churn_model(model, X_test_scaled, y_test)
+    version = model_registry.save_model(
+        CHURN_MODEL_NAME,
+        {"model": model, "scaler": scaler, "features": CHURN_FEATURES, "metrics": metrics},
+        activate=activate,
+    )
+    if activate:
+        invalidate("churn_model")
+    print(f"✅ Churn model registered as version {version}.")
+    return version
+
+
+def get_churn_model():
+    """
+    Returns the current churn model artifact (``model``, ``scaler``, ``features``,
+    ``metrics``, ``version``), cached per process until another version is pinned.
+    Returns None if no model has been trained yet.
+    """
+    return model_registry.get_model(CHURN_MODEL_NAME)
+
+def churn_features(registration_dates, last_purchase_dates, today=None):
+    """
+    Builds the (n, 2) [tenure, last_purchase_gap] feature matrix used by the churn model.
+    A missing registration date counts as a brand-new customer, a missing last purchase as 365 days.
+    """
+    today = today or now().date()
+    tenure = days_since(registration_dates, today, default=0)
+    last_purchase_gap = days_since(last_purchase_dates, today, default=365)
+    return np.column_stack((tenure, last_purchase_gap))
+
+
+def predict_and_update_churn(chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Predicts churn probability for all customers and updates their churn score.
+
+    Customers are streamed in chunks of ``chunk_size``; each chunk is scored with a
+    single ``predict_proba`` call, written back with ``bulk_update`` and recorded in
+    the ``ChurnPrediction`` history with ``bulk_create``.
     """
+    artifact = get_churn_model()
+    if artifact is None:
+        # Bootstrap the registry on the very first run.
+        if train_and_register_churn_model() is None:
+            print("⚠️ No trained churn model available, skipping churn update.")
+            return 0
+        artifact = get_churn_model()
+    churn_model, churn_scaler = artifact["model"], artifact["scaler"]
+
+    today = now().date()
+    started = time.perf_counter()
+    scored = 0
+
     customers = Customer.objects.all()
+    fields = ("id", "registration_date", "last_purchase_date")
+    for rows in iter_value_chunks(customers, fields, chunk_size):
+        ids, registration_dates, last_purchase_dates = zip(*rows)
+
+        features_scaled = churn_scaler.transform(
+            churn_features(registration_dates, last_purchase_dates, today)
+        )
+        churn_probabilities = churn_model.predict_proba(features_scaled)[:, 1]
+        churn_scores = np.round(churn_probabilities, 2)
+
+        Customer.objects.bulk_update(
+            [Customer(id=pk, churn_score=float(score)) for pk, score in zip(ids, churn_scores)],
+            ["churn_score"],
+            batch_size=chunk_size,
+        )
+        ChurnPrediction.objects.bulk_create(
+            [ChurnPrediction(customer_id=pk, churn_probability=float(p)) for pk, p in zip(ids, churn_probabilities)],
+            batch_size=chunk_size,
+        )
+        scored += len(ids)
+
+    invalidate("customers")
+    elapsed = time.perf_counter() - started
+    rate = scored / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Updated churn scores for {scored} customers in {elapsed:.2f}s ({rate:,.0f} rows/s).")
+    return scored
+
+
+# --------------------------
+# Online Churn Scoring
+# --------------------------
+class ChurnMicroBatcher:
+    """
+    Coalesces concurrent scoring requests into micro-batches so that a single
+    ``predict_proba`` call serves every caller waiting at that moment.
+
+    A daemon thread collects requests for up to ``max_wait`` seconds (or until
+    ``max_batch_size`` rows are queued), scores them together with the current
+    model and resolves each caller's Future with ``(model_version, probabilities)``.
+    """
 
-    for customer in customers:
-        tenure = (now().date() - customer.registration_date).days
-        last_purchase_gap = (now().date() - customer.last_purchase_date).days if customer.last_purchase_date else 365
+    def __init__(self, max_batch_size=512, max_wait=0.002):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._requests = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    def score(self, features):
+        """
+        Scores an (n, 2) feature matrix, blocking until its micro-batch is done.
+
+        Returns:
+            tuple: (model_version, churn probabilities as a NumPy array)
+        """
+        return self.submit(features).result()
+
+    def submit(self, features):
+        """
+        Queues an (n, 2) feature matrix without blocking. Async callers await
+        the returned Future with ``asyncio.wrap_future``.
+
+        Returns:
+            Future: Resolves to (model_version, churn probabilities).
+        """
+        self._ensure_worker()
+        future = Future()
+        self._requests.put((features, future))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="churn-micro-batcher", daemon=True)
+                    self._worker.start()
+
+    def _collect_batch(self):
+        batch = [self._requests.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                artifact = get_churn_model()
+                if artifact is None:
+                    raise RuntimeError("No churn model has been trained yet.")
+                features = np.vstack([features for features, _ in batch])
+                probabilities = artifact["model"].predict_proba(artifact["scaler"].transform(features))[:, 1]
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for features, future in batch:
+                future.set_result((artifact["version"], probabilities[offset:offset + len(features)]))
+                offset += len(features)
+
+
+churn_batcher = ChurnMicroBatcher()
+churn_score_cache = LRUCache(maxsize=100_000)
+
+
+def predict_churn_many(customer_ids):
+    """
+    Scores a list of customers online, reading only their two feature columns.
 
-        features_array = np.array([[tenure, last_purchase_gap]])
-        features_scaled = churn_scaler.transform(features_array)
+    Cached scores are keyed on (customer id, last_purchase_date, model version, day),
+    the day being part of the key because tenure grows daily. Misses are scored in
+    one vectorised call through the shared micro-batcher.
 
-        # Predict Churn Probability
-        churn_probability = churn_model.predict_proba(features_scaled)[0][1]
+    Returns:
+        dict: {customer_id: churn score}; unknown customers are omitted.
+    """
+    version = _current_churn_version()
+    today = now().date()
+    scores, misses = _cached_churn_scores(_churn_feature_rows(customer_ids), version, today)
+    if misses:
+        _, registration_dates, last_purchase_dates = zip(*misses)
+        version, probabilities = churn_batcher.score(
+            churn_features(registration_dates, last_purchase_dates, today)
+        )
+        _store_churn_scores(scores, misses, version, probabilities, today)
+    return scores
 
-        # Update Churn Score
-        customer.churn_score = round(churn_probability, 2)
-        customer.save()
 
-    print("✅ Updated churn scores for all customers.")
+async def apredict_churn_many(customer_ids):
+    """
+    Async counterpart of predict_churn_many(): features are read with the async
+    ORM and the scoring is awaited on the micro-batcher, so no worker thread
+    is held while the model runs.
+    """
+    version = await sync_to_async(_current_churn_version)()
+    today = now().date()
+    rows = [row async for row in _churn_feature_rows(customer_ids)]
+    scores, misses = _cached_churn_scores(rows, version, today)
+    if misses:
+        _, registration_dates, last_purchase_dates = zip(*misses)
+        version, probabilities = await asyncio.wrap_future(
+            churn_batcher.submit(churn_features(registration_dates, last_purchase_dates, today))
+        )
+        _store_churn_scores(scores, misses, version, probabilities, today)
+    return scores
+
+
+def _current_churn_version():
+    artifact = get_churn_model()
+    if artifact is None:
+        raise RuntimeError("No churn model has been trained yet.")
+    return artifact["version"]
+
+
+def _churn_feature_rows(customer_ids):
+    return Customer.objects.filter(id__in=customer_ids).values_list(
+        "id", "registration_date", "last_purchase_date"
+    )
+
+
+def _cached_churn_scores(rows, version, today):
+    """
+    Splits feature rows into cached ``{customer_id: score}`` and the rows still to score.
+    """
+    scores = {}
+    misses = []
+    for row in rows:
+        score = churn_score_cache.get((row[0], row[2], version, today))
+        if score is None:
+            misses.append(row)
+        else:
+            scores[row[0]] = score
+    return scores, misses
+
+
+def _store_churn_scores(scores, misses, version, probabilities, today):
+    for (pk, _, last_purchase_date), probability in zip(misses, probabilities):
+        score = round(float(probability), 2)
+        churn_score_cache.set((pk, last_purchase_date, version, today), score)
+        scores[pk] = score
+
+
+def predict_churn(customer_id):
+    """
+    Returns the churn score for a single customer, or None if it does not exist.
+    """
+    return predict_churn_many([customer_id]).get(customer_id)
 
 
 # --------------------------
 # Sales Forecasting Model (Placeholder)
 # --------------------------
-def forecast_sales_for_product(product):
+# First number in a sales_volume string plus an optional K/M multiplier directly attached to
+# it (not the first letter of the next word, as in "5 months"), e.g. "400+ bought in past month", "1K+ bought in past month", "1.5M+ views".
+SALES_VOLUME_PATTERN = r'(?P<number>\d[\d,]*(?:\.\d+)?)(?:(?P<suffix>[KkMm])(?![A-Za-z]))?'
+SALES_VOLUME_MULTIPLIERS = {"K": 1_000, "M": 1_000_000}
+
+def parse_sales_volume(sales_volume_str):
     """
-    Generates a sales forecast for a given product using its scraped data.
-    The forecast is based on:
-      - Extracting a base sales figure from the 'sales_volume' string.
-      - Analyzing customer review sentiment from 'customers_say'.
-      - Adjusting the base sales with a sentiment-based multiplier.
-    
-    Parameters:
-        product (Product): A Product model instance.
-    
-    Returns:
-        dict: Contains the base sales, sentiment polarity, and forecasted sales.
+    Extracts a unit count from a free-text ``sales_volume`` string such as
+    "400+ bought in past month". Returns None if the string has no number.
     """
-    # --- Extract base sales from the "sales_volume" field ---
-    sales_volume_str = product.sales_volume if product.sales_volume else ""
-    # Use regex to extract the first number from the sales_volume string.
-    numbers = re.findall(r'\d+', sales_volume_str)
-    base_sales = int(numbers[0]) if numbers else 0
+    match = re.search(SALES_VOLUME_PATTERN, sales_volume_str or "")
+    if not match:
+        return None
+    number = float(match.group("number").replace(",", ""))
+    suffix = (match.group("suffix") or "").upper()
+    return int(number * SALES_VOLUME_MULTIPLIERS.get(suffix, 1))
+
+def parse_sales_volumes(sales_volumes):
+    """
+    Vectorised parse_sales_volume over a pandas Series using ``str.extract``.
+    Returns a nullable integer Series aligned with the input.
+    """
+    parts = sales_volumes.astype("string").str.extract(SALES_VOLUME_PATTERN)
+    numbers = pd.to_numeric(parts["number"].str.replace(",", "", regex=False))
+    multipliers = parts["suffix"].str.upper().map(SALES_VOLUME_MULTIPLIERS).fillna(1)
+    return (numbers * multipliers).astype("Int64")
 
-    # --- Sentiment Analysis on Customer Reviews ---
-    review_text = product.customers_say if product.customers_say else ""
-    polarity = 0.0
-    if review_text:
-        sentiment = TextBlob(review_text).sentiment
-        polarity = sentiment.polarity  # Ranges from -1 (negative) to 1 (positive)
+def backfill_sales_volume_units(chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parses ``Product.sales_volume`` into ``sales_volume_units`` for the whole
+    catalog, one vectorised ``str.extract`` and ``bulk_update`` per chunk.
 
-    # --- Forecast Calculation ---
+    Returns:
+        int: The number of products processed.
+    """
+    processed = 0
+    products = Product.objects.all()
+    for rows in iter_value_chunks(products, ("id", "sales_volume"), chunk_size):
+        chunk = pd.DataFrame(rows, columns=["id", "sales_volume"])
+        chunk["units"] = parse_sales_volumes(chunk["sales_volume"])
+        Product.objects.bulk_update(
+            [
+                Product(id=pk, sales_volume_units=None if pd.isna(units) else int(units))
+                for pk, units in zip(chunk["id"], chunk["units"])
+            ],
+            ["sales_volume_units"],
+            batch_size=chunk_size,
+        )
+        processed += len(rows)
+    print(f"✅ Backfilled sales volume units for {processed} products.")
+    return processed
+
+def adjust_for_sentiment(base_sales, polarity):
+    """
+    Scales base sales by review sentiment; works on scalars and NumPy arrays alike.
+    """
     # For demonstration, assume the base forecast is the base_sales.
-    # Adjust the forecast with sentiment: for example, each 0.1 positive polarity adds 5% to the forecast.
+    # Adjust the forecast with sentiment: for example, each 0.1 positive polarity might add 5% to the forecast.
     # Here we use a multiplier of 0.5 for polarity adjustment.
     sentiment_adjustment_factor = 1 + (polarity * 0.5)
-    forecasted_sales = base_sales * sentiment_adjustment_factor
-
-    return {
-        "base_sales": base_sales,
-        "sentiment_polarity": polarity,
-        "forecasted_sales": forecasted_sales
-    }
+    return base_sales * sentiment_adjustment_factor
 
 def forecast_sales_for_product(product):
     """
     Generates a sales forecast for a given product using its scraped data.
     The forecast is based on:
       - Extracting a base sales figure from the 'sales_volume' string.
-      - Analyzing customer review sentiment from 'customers_say'.
+      - The mean sentiment of its scored reviews ('review_sentiment'), falling
+        back to analysing the detail's 'customers_say' summary.
       - Adjusting the base sales with a sentiment-based multiplier.
     
     Parameters:
@@ -187,34 +526,23 @@ def forecast_sales_for_product(product):
     Returns:
         dict: Contains the base sales, sentiment polarity, and forecasted sales.
     """
-    # --- Extract base sales from the "sales_volume" field ---
-    sales_volume_str = product.sales_volume if product.sales_volume else ""
-    # Use regex to extract numeric parts
-    numbers = re.findall(r'\d+', sales_volume_str)
-    if numbers:
-        base_sales = int(numbers[0])
-        sales_volume_upper = sales_volume_str.upper()
-        # Check for shorthand notation: "K" indicates thousands, "M" indicates millions.
-        if "K" in sales_volume_upper:
-            base_sales *= 1000
-        elif "M" in sales_volume_upper:
-            base_sales *= 1000000
-    else:
-        base_sales = 0
+    # --- Base sales, parsed from "sales_volume" at ingest time ---
+    base_sales = product.sales_volume_units
+    if base_sales is None:
+        base_sales = parse_sales_volume(product.sales_volume) or 0
 
     # --- Sentiment Analysis on Customer Reviews ---
-    review_text = product.customers_say if product.customers_say else ""
-    polarity = 0.0
-    if review_text:
-        sentiment = TextBlob(review_text).sentiment
-        polarity = sentiment.polarity  # Ranges from -1 (negative) to 1 (positive)
+    polarity = product.review_sentiment  # Ranges from -1 (negative) to 1 (positive)
+    if polarity is None:
+        try:
+            review_text = product.detail.customers_say or ""
+        except ProductDetail.DoesNotExist:
+            review_text = ""
+        # Served from the persistent sentiment cache; TextBlob only runs for unseen text.
+        polarity = sentiment_cache.polarity(review_text)
 
     # --- Forecast Calculation ---
-    # For demonstration, assume the base forecast is the base_sales.
-    # Adjust the forecast with sentiment: for example, each 0.1 positive polarity might add 5% to the forecast.
-    # Here we use a multiplier of 0.5 for polarity adjustment.
-    sentiment_adjustment_factor = 1 + (polarity * 0.5)
-    forecasted_sales = base_sales * sentiment_adjustment_factor
+    forecasted_sales = adjust_for_sentiment(base_sales, polarity)
 
     return {
         "base_sales": base_sales,
@@ -222,57 +550,76 @@ def forecast_sales_for_product(product):
         "forecasted_sales": forecasted_sales
     }
 
-def forecast_and_store_sales():
+def forecast_and_store_sales(chunk_size=DEFAULT_CHUNK_SIZE, workers=None, period="Monthly"):
     """
-    Iterates over all products, computes a sales forecast for each,
-    and stores the forecast result in the SalesForecast model.
-    """
-    products = Product.objects.all()
-    # Define the forecast date; you might choose the next month or a specific period.
-    forecast_date = timezone.now().date()  
-    period = "Monthly"  # or "Weekly", etc.
-
-    for product in products:
-        forecast_data = forecast_sales_for_product(product)
-        predicted_sales = forecast_data["forecasted_sales"]
-
-        # Create or update the SalesForecast record for this product and forecast date.
-        forecast_record, created = SalesForecast.objects.update_or_create(
-            product=product,
-            forecast_date=forecast_date,
-            period=period,
-            defaults={"predicted_sales": predicted_sales}
-        )
-
-        print(
-            f"Forecast for {product.name}: Base Sales = {forecast_data['base_sales']}, "
-            f"Polarity = {forecast_data['sentiment_polarity']}, Predicted Sales = {predicted_sales}"
-        )
-
-    return "Sales forecast updated for all products."
+    Computes a sales forecast for every product and stores it in SalesForecast.
 
-# --------------------------
-# Product Recommendation Model (Placeholder)
-# --------------------------
-def recommend_products(customer_id):
-    """
-    Returns a list of randomly recommended product names.
-    """
-    products = ["Smartphone", "Laptop", "Headphones", "Shoes", "Backpack", "T-Shirt", "Wristwatch"]
-    recommended = random.sample(products, 3)  # Pick 3 random products
-    return recommended
+    Products are streamed in chunks reading only ``id``, ``sales_volume_units``,
+    ``review_sentiment`` and the detail's ``customers_say``; the summary is only
+    analysed for products without scored reviews. Sentiment for text not already in the sentiment cache is
+    analysed across a pool of ``workers`` processes (default: one per core), started on the first miss; the
+    forecasts are computed with NumPy, and each chunk is written with one bulk
+    upsert on (product, forecast_date, period, method, measure). The forecast
+    scales sales volume in units, so it is stored as a ``quantity`` forecast.
 
-# --------------------------
-# Dynamic Pricing Insights (Placeholder)
-# --------------------------
-def get_pricing_trends(product_id):
-    """
-    Simulates pricing trends for a given product.
+    Returns:
+        int: The number of forecasts written.
     """
-    base_price = round(random.uniform(100, 500), 2)
-    trend = [round(base_price * random.uniform(0.9, 1.1), 2) for _ in range(5)]
-    return {
-        "product_id": product_id,
-        "price_trends": trend,
-        "suggested_price": round(sum(trend) / len(trend), 2)
-    }
+    # Define the forecast date; you might choose the next month or a specific period.
+    forecast_date = now().date()
+    started = time.perf_counter()
+    written = 0
+
+    workers = workers or os.cpu_count()
+    # Started on the first cache miss, so runs served entirely from the cache fork no processes.
+    pool = None
+
+    def analyze_in_pool(texts):
+        nonlocal pool
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(texts) // (4 * workers))
+        return list(pool.map(analyze_sentiment, texts, chunksize=chunksize))
+
+    try:
+        products = Product.objects.all()
+        fields = ("id", "sales_volume_units", "review_sentiment", "detail__customers_say")
+        for rows in iter_value_chunks(products, fields, chunk_size):
+            ids, sales_volume_units, review_sentiments, summaries = zip(*rows)
+            summaries = [
+                (text or "") if sentiment is None else ""
+                for sentiment, text in zip(review_sentiments, summaries)
+            ]
+
+            sentiments = sentiment_cache.get_many([text for text in summaries if text], analyzer=analyze_in_pool)
+            polarity = np.array([
+                sentiment if sentiment is not None else sentiments[text][0] if text else 0.0
+                for sentiment, text in zip(review_sentiments, summaries)
+            ])
+            base_sales = np.array([units or 0 for units in sales_volume_units], dtype=np.float64)
+            predicted_sales = np.round(adjust_for_sentiment(base_sales, polarity), 2)
+
+            SalesForecast.objects.bulk_create(
+                [
+                    SalesForecast(
+                        product_id=pk, forecast_date=forecast_date, period=period,
+                        method="sentiment", measure="quantity", predicted_sales=sales,
+                    )
+                    for pk, sales in zip(ids, predicted_sales.tolist())
+                ],
+                update_conflicts=True,
+                unique_fields=["product", "forecast_date", "period", "method", "measure"],
+                update_fields=["predicted_sales"],
+                batch_size=chunk_size,
+            )
+            written += len(ids)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    invalidate("forecasts")
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Stored {written} sales forecasts in {elapsed:.2f}s ({rate:,.0f} products/s).")
+    print(f"Sentiment cache: {sentiment_cache.stats()}")
+    return written
@@ -0,0 +1,163 @@
+import os
+import re
+import threading
+from pathlib import Path
+
+import joblib
+from django.conf import settings
+from django.utils.timezone import now
+
+# --------------------------
+# Versioned Model Registry
+# --------------------------
+# Each model name gets its own directory under settings.ML_MODEL_DIR holding
+# one uncompressed joblib artifact per version (v0001.joblib, v0002.joblib, ...)
+# and a CURRENT file naming the version that serving code should load.
+# Serving processes keep the loaded artifact in memory and reload it when the
+# CURRENT pointer is replaced, so a pin or rollback run from a management
+# command reaches every web worker on its next request.
+
+VERSION_FILE_RE = re.compile(r"^v(\d+)\.joblib$")
+CURRENT_POINTER = "CURRENT"
+
+# name -> (pointer stamp, artifact)
+_loaded_models = {}
+_load_lock = threading.Lock()
+
+
+def _model_dir(name):
+    return Path(settings.ML_MODEL_DIR) / name
+
+
+def _artifact_path(name, version):
+    return _model_dir(name) / f"v{version:04d}.joblib"
+
+
+def list_versions(name):
+    """
+    Returns the registered versions of a model in ascending order.
+    """
+    model_dir = _model_dir(name)
+    if not model_dir.is_dir():
+        return []
+    versions = []
+    for entry in model_dir.iterdir():
+        match = VERSION_FILE_RE.match(entry.name)
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def current_version(name):
+    """
+    Returns the version pinned in the CURRENT pointer, falling back to the
+    latest registered version, or None if nothing has been registered yet.
+    """
+    pointer = _model_dir(name) / CURRENT_POINTER
+    if pointer.exists():
+        return int(pointer.read_text().strip())
+    versions = list_versions(name)
+    return versions[-1] if versions else None
+
+
+def set_current_version(name, version):
+    """
+    Pins the version served for a model. The pointer is replaced atomically so
+    a process starting up concurrently never reads a half-written file.
+    """
+    if version not in list_versions(name):
+        raise ValueError(f"Model '{name}' has no version {version}.")
+    model_dir = _model_dir(name)
+    tmp_pointer = model_dir / f"{CURRENT_POINTER}.tmp"
+    tmp_pointer.write_text(str(version))
+    os.replace(tmp_pointer, model_dir / CURRENT_POINTER)
+    clear_cache(name)
+
+
+def save_model(name, artifact, activate=True):
+    """
+    Persists an artifact dict (model, scaler, features, metrics, ...) as the
+    next version of ``name`` and, by default, makes it the current version.
+
+    Returns:
+        int: The newly assigned version number.
+    """
+    model_dir = _model_dir(name)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    versions = list_versions(name)
+    version = versions[-1] + 1 if versions else 1
+
+    artifact = dict(artifact, version=version, created_at=now().isoformat())
+    # Written uncompressed so NumPy arrays inside can be memory-mapped on load.
+    joblib.dump(artifact, _artifact_path(name, version))
+
+    if activate:
+        set_current_version(name, version)
+    return version
+
+
+def rollback(name):
+    """
+    Re-pins the version registered immediately before the current one.
+
+    Returns:
+        int: The version now being served.
+    """
+    version = current_version(name)
+    older = [v for v in list_versions(name) if version is not None and v < version]
+    if not older:
+        raise ValueError(f"Model '{name}' has no version older than {version} to roll back to.")
+    set_current_version(name, older[-1])
+    return older[-1]
+
+
+def load_model(name, version=None):
+    """
+    Loads a specific version (default: current) from disk, memory-mapping any
+    NumPy arrays in the artifact. Returns None if no version is registered.
+    """
+    version = version or current_version(name)
+    if version is None:
+        return None
+    return joblib.load(_artifact_path(name, version), mmap_mode="r")
+
+
+def _pointer_stamp(name):
+    """
+    Identifies the current CURRENT pointer file. set_current_version() swaps in
+    a new file, so the inode and mtime change whenever any process re-pins.
+    """
+    try:
+        stat = (_model_dir(name) / CURRENT_POINTER).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def get_model(name):
+    """
+    Returns the current version of a model. It is loaded once per process and
+    reloaded when the CURRENT pointer changes, at the cost of one stat() per call.
+    """
+    stamp = _pointer_stamp(name)
+    cached = _loaded_models.get(name)
+    if cached is None or cached[0] != stamp:
+        with _load_lock:
+            cached = _loaded_models.get(name)
+            if cached is None or cached[0] != stamp:
+                artifact = load_model(name)
+                if artifact is None:
+                    return None
+                cached = _loaded_models[name] = (stamp, artifact)
+    return cached[1]
+
+
+def clear_cache(name=None):
+    """
+    Drops cached artifacts so the next get_model() call reloads from disk.
+    """
+    with _load_lock:
+        if name is None:
+            _loaded_models.clear()
+        else:
+            _loaded_models.pop(name, None)
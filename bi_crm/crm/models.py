@@ -2,6 +2,8 @@ from django.db import models
 from django.utils import timezone
 import random
 
+from .fields import CompressedJSONField
+
 # -----------------------------
 # Customer & Segmentation
 # -----------------------------
@@ -63,8 +65,7 @@ class Product(models.Model):
     currency = models.CharField(max_length=10, blank=True, null=True)
     country = models.CharField(max_length=50, blank=True, null=True)
     
-    # Product Details and Description
-    description = models.TextField(blank=True, null=True)
+    # Product Details (long text and JSON payloads live in ProductDetail)
     product_byline = models.CharField(max_length=200, blank=True, null=True)
     product_byline_link = models.URLField(blank=True, null=True)
     rating = models.FloatField(blank=True, null=True)
@@ -82,15 +83,12 @@ class Product(models.Model):
     
     # Sales and Review Info
     sales_volume = models.CharField(max_length=50, blank=True, null=True)  # e.g., "400+ bought in past month"
-    customers_say = models.TextField(blank=True, null=True)
-    
-    # Detailed Product Information stored as JSON
-    product_information = models.JSONField(blank=True, null=True)  # e.g., dimensions, manufacturer, etc.
-    product_details = models.JSONField(blank=True, null=True)      # Additional details like material, closure type, etc.
+    # Unit count parsed from sales_volume at ingest (e.g., 400), indexed for ranking queries
+    sales_volume_units = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+    # Mean sentiment of the product's scored reviews, maintained by crm.review_sentiment
+    review_sentiment = models.FloatField(blank=True, null=True)
     
     # Media Assets
-    product_photos = models.JSONField(blank=True, null=True)  # List of photo URLs
-    product_videos = models.JSONField(blank=True, null=True)  # List of video dictionaries
     video_thumbnail = models.URLField(blank=True, null=True)
     has_video = models.BooleanField(default=False)
     
@@ -98,22 +96,49 @@ class Product(models.Model):
     delivery = models.TextField(blank=True, null=True)
     primary_delivery_time = models.CharField(max_length=100, blank=True, null=True)
     
-    # Category & Variations
-    category_path = models.JSONField(blank=True, null=True)      # List of category dictionaries
-    product_variations = models.JSONField(blank=True, null=True)   # Variation details (size, color, etc.)
-    
     # Deal & Brand Info
     deal_badge = models.CharField(max_length=100, blank=True, null=True)
     has_aplus = models.BooleanField(default=False)
     has_brandstory = models.BooleanField(default=False)
-    
-    # Additional Info (if any)
-    more_info = models.JSONField(blank=True, null=True)
+
+    # SHA-256 of the last parsed scraper payload, used to skip unchanged upserts
+    content_hash = models.CharField(max_length=64, blank=True, null=True)
+    # When the scraper last fetched this product, used to schedule refreshes
+    last_fetched_at = models.DateTimeField(blank=True, null=True, db_index=True)
 
     def __str__(self):
         return self.name
 
 
+class ProductDetail(models.Model):
+    """
+    Bulky scraped payloads of a Product, kept out of the products table so that
+    catalogue scans only read the narrow columns. Load it explicitly
+    (``product.detail`` or ``select_related('detail')``) when it is needed.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='detail')
+    description = models.TextField(blank=True, null=True)
+    customers_say = models.TextField(blank=True, null=True)
+
+    # Detailed Product Information, stored as compressed JSON
+    product_information = CompressedJSONField(blank=True, null=True)  # e.g., dimensions, manufacturer, etc.
+    product_details = CompressedJSONField(blank=True, null=True)      # Additional details like material, closure type, etc.
+
+    # Media Assets
+    product_photos = CompressedJSONField(blank=True, null=True)  # List of photo URLs
+    product_videos = CompressedJSONField(blank=True, null=True)  # List of video dictionaries
+
+    # Category & Variations
+    category_path = CompressedJSONField(blank=True, null=True)      # List of category dictionaries
+    product_variations = CompressedJSONField(blank=True, null=True)   # Variation details (size, color, etc.)
+
+    # Additional Info (if any)
+    more_info = CompressedJSONField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Details of {self.product_id}"
+
+
 class PriceHistory(models.Model):
     """
     Tracks historical pricing data from various e-commerce platforms.
@@ -128,11 +153,50 @@ class PriceHistory(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_history')
     platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    scraped_date = models.DateTimeField(auto_now_add=True)
+    scraped_date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'scraped_date'], name='pricehistory_product_date'),
+        ]
     
     def __str__(self):
         return f"{self.product.name} on {self.platform} @ {self.price}"
 
+class DailyPriceRollup(models.Model):
+    """
+    Daily open/high/low/close summary of PriceHistory per product and platform,
+    maintained incrementally by crm.pricing so trend queries never scan raw history.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_prices')
+    platform = models.CharField(max_length=20, choices=PriceHistory.PLATFORM_CHOICES)
+    date = models.DateField()
+    open_price = models.DecimalField(max_digits=10, decimal_places=2)
+    high_price = models.DecimalField(max_digits=10, decimal_places=2)
+    low_price = models.DecimalField(max_digits=10, decimal_places=2)
+    close_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Sum and count rather than a stored mean, so new observations can be merged in.
+    price_sum = models.DecimalField(max_digits=14, decimal_places=2)
+    sample_count = models.PositiveIntegerField()
+    # When the opening and closing prices were observed; late rows are merged by time.
+    first_seen_at = models.DateTimeField()
+    last_seen_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'platform', 'date'],
+                name='unique_daily_price_rollup',
+            ),
+        ]
+
+    @property
+    def mean_price(self):
+        return self.price_sum / self.sample_count
+
+    def __str__(self):
+        return f"{self.product_id} on {self.platform} {self.date}: {self.close_price}"
+
 # -----------------------------
 # Orders & Order Items
 # -----------------------------
@@ -150,6 +214,12 @@ class Order(models.Model):
     order_date = models.DateTimeField(auto_now_add=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
+
+    class Meta:
+        indexes = [
+            # Sort key of the keyset-paginated order list (newest first).
+            models.Index(fields=['order_date', 'id'], name='order_date_id'),
+        ]
     
     def __str__(self):
         return self.order_number
@@ -181,12 +251,63 @@ class Review(models.Model):
     rating = models.PositiveSmallIntegerField(choices=RATING_CHOICES)
     comment = models.TextField(blank=True, null=True)
     review_date = models.DateTimeField(auto_now_add=True)
-    # Optional: A computed sentiment score (e.g., from sentiment analysis on the comment)
+    # Bumped on every save, so edited comments are picked up for re-scoring
+    updated_at = models.DateTimeField(auto_now=True)
+    # Polarity of the comment, from -1 to 1 (see crm.review_sentiment)
     sentiment_score = models.DecimalField(max_digits=4, decimal_places=2, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Sort key of the sentiment scoring watermark.
+            models.Index(fields=['updated_at', 'id'], name='review_updated_id'),
+        ]
     
     def __str__(self):
         return f"Review by {self.customer} for {self.product}"
 
+class SentimentCacheEntry(models.Model):
+    """
+    Persisted sentiment score for a piece of text, keyed by a SHA-256 of the
+    analyzer version and the text (see crm.sentiment).
+    """
+    key = models.CharField(max_length=64, unique=True)
+    polarity = models.FloatField()
+    subjectivity = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Sentiment {self.key[:12]}: {self.polarity:.2f}"
+
+# -----------------------------
+# Background Job State
+# -----------------------------
+class JobWatermark(models.Model):
+    """
+    Remembers how far an incremental job has processed a table (usually the
+    highest primary key seen), so the next run only reads newer rows. Jobs
+    that follow edits keep an (updated_at, id) position in ``last_seen_at``
+    and ``last_id``.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    last_seen_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+class DashboardSnapshot(models.Model):
+    """
+    Precomputed dashboard figures (see crm.dashboard), refreshed in the
+    background so the dashboard page never aggregates live data.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=dict)
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} snapshot @ {self.refreshed_at}"
+
 # -----------------------------
 # ML Predictions & Forecasts
 # -----------------------------
@@ -231,7 +352,25 @@ class SalesForecast(models.Model):
         max_length=20,
         help_text="Forecast period (e.g., Daily, Weekly, Monthly)"
     )
+    method = models.CharField(
+        max_length=20,
+        default='sentiment',
+        help_text="Model that produced the forecast (e.g., sentiment, holt, seasonal-naive)"
+    )
+    measure = models.CharField(
+        max_length=20,
+        default='quantity',
+        help_text="What is forecast: quantity (units) or revenue"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'forecast_date', 'period', 'method', 'measure'],
+                name='unique_sales_forecast_per_method',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.product.name} forecast for {self.forecast_date}: {self.predicted_sales}"
@@ -0,0 +1,108 @@
+import base64
+import json
+from dataclasses import dataclass
+
+from django.db.models import Q
+
+# --------------------------
+# Keyset (Seek) Pagination
+# --------------------------
+# Pages are addressed by the sort key of the last row shown rather than by
+# OFFSET, so fetching page 10,000 costs the same index seek as page 1. The
+# cursor is an opaque URL-safe token holding those key values; the sort must
+# end in a unique column (the primary key) so that no row is skipped or repeated.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str | None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(value) for value in values]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, model, fields):
+    """
+    Turns a cursor back into typed key values for ``fields`` of ``model``.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [model._meta.get_field(field).to_python(value) for field, value in zip(fields, values)]
+    except Exception:
+        raise InvalidCursor("Invalid pagination cursor.")
+
+
+def page_size_from(request, default=DEFAULT_PAGE_SIZE):
+    try:
+        return max(1, min(int(request.GET.get("page_size", default)), MAX_PAGE_SIZE))
+    except ValueError:
+        return default
+
+
+def _seek(queryset, ordering, cursor):
+    """
+    Orders ``queryset`` by ``ordering`` and restricts it to the rows after ``cursor``.
+    """
+    descending = ordering[0].startswith("-")
+    fields = [field.lstrip("-") for field in ordering]
+    queryset = queryset.order_by(*ordering)
+
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, fields)
+        lookup = "lt" if descending else "gt"
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+        condition = Q()
+        for position, field in enumerate(fields):
+            equal = {prefix: value for prefix, value in zip(fields[:position], values[:position])}
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[position]})
+        # The redundant bound on the leading key lets the database seek into
+        # the index instead of scanning it from the start.
+        queryset = queryset.filter(condition, **{f"{fields[0]}__{lookup}e": values[0]})
+    return queryset, fields
+
+
+def _page(rows, fields, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [last[field] if isinstance(last, dict) else getattr(last, field) for field in fields]
+        )
+    return KeysetPage(items=rows, next_cursor=next_cursor)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns the page of ``queryset`` that follows ``cursor`` under ``ordering``,
+    a tuple of field names that all sort in the same direction (e.g.
+    ``("-order_date", "-id")``) and ends with the primary key. Works with model
+    querysets and ``values()`` querysets alike.
+    """
+    queryset, fields = _seek(queryset, ordering, cursor)
+    return _page(list(queryset[:page_size + 1]), fields, page_size)
+
+
+async def akeyset_paginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Async counterpart of keyset_paginate(), fetching the page with the async ORM.
+    """
+    queryset, fields = _seek(queryset, ordering, cursor)
+    return _page([row async for row in queryset[:page_size + 1]], fields, page_size)
@@ -0,0 +1,344 @@
+import operator
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import reduce
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .caching import invalidate
+from .ml_models import iter_value_chunks
+from .models import DailyPriceRollup, JobWatermark, PriceHistory, Product
+
+# --------------------------
+# Price Trend Analytics
+# --------------------------
+# Raw PriceHistory rows are folded into DailyPriceRollup (one row per product,
+# platform and day). The rollup is maintained incrementally: a JobWatermark
+# records the highest PriceHistory id already merged, so each run only reads
+# newer rows. Trend queries read a bounded number of rollup rows through the
+# (product, platform, date) unique index instead of scanning raw history.
+
+ROLLUP_WATERMARK = "daily_price_rollup"
+# last_seen_at records the latest cutoff compact_price_history() has thinned rows before.
+COMPACTION_WATERMARK = "price_history_compaction"
+DEFAULT_ROLLUP_BATCH_SIZE = 5000
+DEFAULT_TREND_DAYS = 30
+
+_ROLLUP_FIELDS = [
+    "open_price", "high_price", "low_price", "close_price",
+    "price_sum", "sample_count", "first_seen_at", "last_seen_at",
+]
+
+
+def _merge(rollup, price, seen_at):
+    """
+    Adds one observation to a rollup. Observations may arrive out of order
+    (e.g. replayed responses), so open/close follow the observation time.
+    """
+    rollup.high_price = max(rollup.high_price, price)
+    rollup.low_price = min(rollup.low_price, price)
+    rollup.price_sum += price
+    rollup.sample_count += 1
+    if seen_at < rollup.first_seen_at:
+        rollup.open_price, rollup.first_seen_at = price, seen_at
+    if seen_at >= rollup.last_seen_at:
+        rollup.close_price, rollup.last_seen_at = price, seen_at
+
+
+def _rollup_batch(rows):
+    """
+    Merges one batch of ``(product_id, platform, price, scraped_date)`` rows
+    into DailyPriceRollup with a single read and a single upsert.
+    """
+    rollups = {}
+    for product_id, platform, price, scraped_date in rows:
+        key = (product_id, platform, timezone.localtime(scraped_date).date())
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollups[key] = DailyPriceRollup(
+                product_id=product_id, platform=platform, date=key[2],
+                open_price=price, high_price=price, low_price=price, close_price=price,
+                price_sum=price, sample_count=1, first_seen_at=scraped_date, last_seen_at=scraped_date,
+            )
+        else:
+            _merge(rollup, price, scraped_date)
+
+    products_by_date = defaultdict(set)
+    for product_id, _, date in rollups:
+        products_by_date[date].add(product_id)
+    existing = DailyPriceRollup.objects.filter(
+        reduce(operator.or_, (Q(date=date, product_id__in=ids) for date, ids in products_by_date.items()))
+    )
+    for stored in existing:
+        batch_rollup = rollups.get((stored.product_id, stored.platform, stored.date))
+        if batch_rollup is None:
+            continue
+        stored.high_price = max(stored.high_price, batch_rollup.high_price)
+        stored.low_price = min(stored.low_price, batch_rollup.low_price)
+        stored.price_sum += batch_rollup.price_sum
+        stored.sample_count += batch_rollup.sample_count
+        if batch_rollup.first_seen_at < stored.first_seen_at:
+            stored.open_price, stored.first_seen_at = batch_rollup.open_price, batch_rollup.first_seen_at
+        if batch_rollup.last_seen_at >= stored.last_seen_at:
+            stored.close_price, stored.last_seen_at = batch_rollup.close_price, batch_rollup.last_seen_at
+        rollups[(stored.product_id, stored.platform, stored.date)] = stored
+
+    DailyPriceRollup.objects.bulk_create(
+        rollups.values(),
+        update_conflicts=True,
+        unique_fields=["product", "platform", "date"],
+        update_fields=_ROLLUP_FIELDS,
+    )
+    return len(rollups)
+
+
+def rollup_price_history(batch_size=DEFAULT_ROLLUP_BATCH_SIZE, since=None):
+    """
+    Folds PriceHistory rows added since the last run into DailyPriceRollup,
+    skipping rows scraped before ``since`` if given. Each batch and its
+    watermark advance are committed together, so an interrupted run resumes
+    without double counting.
+
+    Returns:
+        int: The number of PriceHistory rows merged.
+    """
+    started = time.perf_counter()
+    latest = PriceHistory.objects.aggregate(latest=Max("id"))["latest"] or 0
+    history = PriceHistory.objects.all() if since is None else PriceHistory.objects.filter(scraped_date__gte=since)
+    merged = 0
+    while True:
+        with transaction.atomic():
+            watermark, _ = JobWatermark.objects.select_for_update().get_or_create(name=ROLLUP_WATERMARK)
+            rows = list(
+                history.filter(id__gt=watermark.last_id, id__lte=latest)
+                .order_by("id")
+                .values_list("id", "product_id", "platform", "price", "scraped_date")[:batch_size]
+            )
+            if not rows:
+                # Rows before ``since`` were skipped; the watermark still has to pass them.
+                if watermark.last_id < latest:
+                    watermark.last_id = latest
+                    watermark.save(update_fields=["last_id", "updated_at"])
+                break
+            _rollup_batch([row[1:] for row in rows])
+            watermark.last_id = rows[-1][0]
+            watermark.save(update_fields=["last_id", "updated_at"])
+        merged += len(rows)
+    if merged:
+        invalidate("prices")
+
+    elapsed = time.perf_counter() - started
+    rate = merged / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Merged {merged} price observations into daily rollups in {elapsed:.2f}s ({rate:,.0f} rows/s).")
+    return merged
+
+
+def rebuild_price_rollups(batch_size=DEFAULT_ROLLUP_BATCH_SIZE):
+    """
+    Drops the rollups and re-aggregates them from PriceHistory. Days that
+    compact_price_history() has thinned no longer hold every observation, so
+    their rollups (including the day the last cutoff fell on) are kept and
+    only later days are rebuilt.
+    """
+    compacted_before = (
+        JobWatermark.objects.filter(name=COMPACTION_WATERMARK).values_list("last_seen_at", flat=True).first()
+    )
+    since = None
+    rollups = DailyPriceRollup.objects.all()
+    if compacted_before is not None:
+        first_day = timezone.localtime(compacted_before).date() + timedelta(days=1)
+        since = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
+        rollups = rollups.filter(date__gte=first_day)
+    with transaction.atomic():
+        rollups.delete()
+        JobWatermark.objects.filter(name=ROLLUP_WATERMARK).delete()
+    return rollup_price_history(batch_size=batch_size, since=since)
+
+
+def get_pricing_trends(product_id, days=DEFAULT_TREND_DAYS):
+    """
+    Summarises a product's price over the last ``days`` days from the daily rollup.
+
+    Returns:
+        dict: ``product_id``, ``price_trends`` (one OHLC row per day and
+        platform, oldest first), ``change_pct`` (first open to last close) and
+        ``suggested_price`` (observation-weighted mean price over the window),
+        the latter two None if there is no price history in the window.
+    """
+    return summarise_price_trends(product_id, list(price_rollups(product_id, days)))
+
+
+def price_rollups(product_id, days=DEFAULT_TREND_DAYS):
+    since = timezone.localdate() - timedelta(days=days)
+    return (
+        DailyPriceRollup.objects.filter(product_id=product_id, date__gte=since)
+        .order_by("date", "platform")
+        .values(
+            "date", "platform", "open_price", "high_price", "low_price", "close_price",
+            "price_sum", "sample_count",
+        )
+    )
+
+
+def summarise_price_trends(product_id, rollups):
+    """
+    Builds the get_pricing_trends() result from the rows of price_rollups().
+    """
+    trends = [
+        {
+            "date": str(row["date"]),
+            "platform": row["platform"],
+            "open": float(row["open_price"]),
+            "high": float(row["high_price"]),
+            "low": float(row["low_price"]),
+            "close": float(row["close_price"]),
+            "mean": round(float(row["price_sum"] / row["sample_count"]), 2),
+            "count": row["sample_count"],
+        }
+        for row in rollups
+    ]
+    change_pct = suggested_price = None
+    if rollups:
+        first_open, last_close = rollups[0]["open_price"], rollups[-1]["close_price"]
+        if first_open:
+            change_pct = round(float((last_close - first_open) / first_open * 100), 2)
+        total = sum((row["price_sum"] for row in rollups), Decimal(0))
+        suggested_price = round(float(total / sum(row["sample_count"] for row in rollups)), 2)
+    return {
+        "product_id": product_id,
+        "price_trends": trends,
+        "change_pct": change_pct,
+        "suggested_price": suggested_price,
+    }
+
+
+# --------------------------
+# Price History Retention
+# --------------------------
+# Rows younger than the retention window are never touched. Older rows are
+# downsampled to the last observation per product, platform and hour (or day),
+# and rows repeating the previous kept price are dropped. The daily OHLC detail
+# is preserved in DailyPriceRollup, which is why only rows the rollup has
+# already merged are eligible. Deletes run in small autocommitted batches so
+# the scraper is never blocked behind one long write transaction.
+
+RESOLUTIONS = ("hourly", "daily")
+DEFAULT_COMPACTION_BATCH_SIZE = 500
+
+
+def _bucket(moment, resolution):
+    moment = timezone.localtime(moment)
+    if resolution == "daily":
+        return moment.date()
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def redundant_price_rows(rows, resolution):
+    """
+    Picks the ids to delete from ``(id, product_id, platform, price, scraped_date)``
+    rows ordered by product, platform and time.
+    """
+    redundant = []
+    kept = []
+    for row in rows:
+        # Within a bucket only the last observation survives.
+        if kept and kept[-1][1:3] == row[1:3] and _bucket(kept[-1][4], resolution) == _bucket(row[4], resolution):
+            redundant.append(kept.pop()[0])
+        kept.append(row)
+
+    previous = None
+    for row in kept:
+        if previous is not None and previous[1:4] == row[1:4]:
+            redundant.append(row[0])  # same product, platform and price as the last kept row
+        else:
+            previous = row
+    return redundant
+
+
+def table_size_bytes(model):
+    """
+    Returns the on-disk size of a model's table and indexes, or None if the
+    database backend cannot report it.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            try:
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN "
+                    "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                    [table, table],
+                )
+            except DatabaseError:
+                return None  # SQLite built without the dbstat virtual table
+        elif connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT data_length + index_length FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def compact_price_history(
+    keep_days=None, resolution="hourly", batch_size=DEFAULT_COMPACTION_BATCH_SIZE, pause=0.0, products_per_scan=200,
+):
+    """
+    Downsamples and de-duplicates PriceHistory older than ``keep_days``
+    (default: settings.PRICE_HISTORY_RETENTION_DAYS).
+
+    Returns:
+        dict: ``deleted`` rows and table size ``before``/``after`` in bytes
+        (None where the backend cannot report it).
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution '{resolution}', expected one of {RESOLUTIONS}.")
+    keep_days = settings.PRICE_HISTORY_RETENTION_DAYS if keep_days is None else keep_days
+
+    # Rows the rollup has not merged yet must not be compacted away.
+    rollup_price_history()
+    merged_up_to = JobWatermark.objects.filter(name=ROLLUP_WATERMARK).values_list("last_id", flat=True).first() or 0
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    # Recorded before anything is deleted, so a rollup rebuild never re-aggregates thinned days.
+    compaction, _ = JobWatermark.objects.get_or_create(name=COMPACTION_WATERMARK)
+    if compaction.last_seen_at is None or compaction.last_seen_at < cutoff:
+        compaction.last_seen_at = cutoff
+        compaction.save(update_fields=["last_seen_at", "updated_at"])
+
+    started = time.perf_counter()
+    size_before = table_size_bytes(PriceHistory)
+    deleted = 0
+    for products in iter_value_chunks(Product.objects.all(), ("id",), products_per_scan):
+        rows = (
+            PriceHistory.objects.filter(
+                product_id__in=[pk for pk, in products], scraped_date__lt=cutoff, id__lte=merged_up_to,
+            )
+            .order_by("product_id", "platform", "scraped_date", "id")
+            .values_list("id", "product_id", "platform", "price", "scraped_date")
+        )
+        redundant = redundant_price_rows(rows, resolution)
+        for offset in range(0, len(redundant), batch_size):
+            # Each batch is its own short transaction (autocommit).
+            deleted += PriceHistory.objects.filter(id__in=redundant[offset:offset + batch_size]).delete()[0]
+            if pause:
+                time.sleep(pause)
+    size_after = table_size_bytes(PriceHistory)
+
+    elapsed = time.perf_counter() - started
+    reclaimed = size_before - size_after if size_before is not None and size_after is not None else None
+    print(
+        f"✅ Compacted price history older than {keep_days} days to {resolution} resolution: "
+        f"deleted {deleted} rows in {elapsed:.2f}s"
+        + (f", reclaimed {reclaimed / 1024 / 1024:.1f} MiB." if reclaimed is not None else ".")
+    )
+    return {"deleted": deleted, "before": size_before, "after": size_after}
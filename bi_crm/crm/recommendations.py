@@ -0,0 +1,466 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max
+from scipy import sparse
+
+from .caching import invalidate
+from .models import OrderItem, Product
+
+# --------------------------
+# Item-Item Product Recommendations
+# --------------------------
+# Purchases are loaded into a customers x products binary CSR matrix. Item-item
+# cosine similarity is computed with one sparse product (X^T X), and the top-K
+# neighbours of every product are stored as compact NumPy arrays. Requests are
+# served from those arrays in memory; the database is only asked for the
+# customer's purchase history and the names of the winning products.
+#
+# Between full rebuilds the index is kept fresh incrementally. OrderItem ids
+# are monotonic, so the index records the last id it has seen (its watermark)
+# and newer rows act as the change log. Only the co-occurrence counts of the
+# new baskets are added, and only the products whose similarities moved are
+# re-ranked. The pending counts are stored inside the index file, so they are
+# replaced together with the watermark they cover. The base matrix
+# (cooccurrence.npz) records the watermark it was built up to, which tells an
+# update whether the index's pending counts still apply on top of it after an
+# interrupted rebuild or compaction.
+
+DEFAULT_TOP_K = 20
+# How often a serving process checks whether the index file was rebuilt.
+INDEX_RELOAD_INTERVAL = 30
+
+
+def index_path():
+    return Path(settings.ML_MODEL_DIR) / "recommendations" / "index.npz"
+
+
+def purchase_matrix(upto=None):
+    """
+    Builds the binary customers x products purchase matrix from completed
+    orders, optionally only from order items with ``id <= upto``.
+
+    Returns:
+        tuple: (CSR matrix, product_ids array giving the product of each column)
+    """
+    items = OrderItem.objects.exclude(order__status="Cancelled")
+    if upto is not None:
+        items = items.filter(id__lte=upto)
+    pairs = (
+        items
+        .values_list("order__customer_id", "product_id")
+        .distinct()
+        .iterator(chunk_size=50_000)
+    )
+    pairs = np.fromiter(pairs, dtype=np.dtype((np.int64, 2)))
+    if not len(pairs):
+        return sparse.csr_matrix((0, 0)), np.array([], dtype=np.int64)
+
+    customer_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    product_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+        shape=(len(customer_ids), len(product_ids)),
+    )
+    return matrix, product_ids
+
+
+def cosine_similarity(cooccurrence):
+    """
+    Turns a square co-occurrence matrix (diagonal = purchase counts) into
+    item-item cosine similarity with a zeroed diagonal.
+    """
+    counts = cooccurrence.diagonal()
+    inverse_norm = sparse.diags(1 / np.sqrt(np.maximum(counts, 1)))
+    similarity = (inverse_norm @ cooccurrence @ inverse_norm).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def top_k_neighbors(similarity, top_k, rows=None):
+    """
+    Extracts the ``top_k`` most similar columns of each CSR row (or of ``rows`` only).
+
+    Returns:
+        tuple: (neighbors int32 array padded with -1, scores float32 array)
+    """
+    rows = np.arange(similarity.shape[0]) if rows is None else np.asarray(rows)
+    neighbors = np.full((len(rows), top_k), -1, dtype=np.int32)
+    scores = np.zeros((len(rows), top_k), dtype=np.float32)
+    indptr, indices, data = similarity.indptr, similarity.indices, similarity.data
+    for out, row in enumerate(rows):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        row_data = data[start:end]
+        best = np.argpartition(-row_data, top_k - 1)[:top_k] if end - start > top_k else np.arange(end - start)
+        best = best[np.argsort(-row_data[best])]
+        neighbors[out, :len(best)] = indices[start:end][best]
+        scores[out, :len(best)] = row_data[best]
+    return neighbors, scores
+
+
+def _csr_arrays(prefix, matrix):
+    matrix = matrix.tocsr()
+    return {
+        f"{prefix}data": matrix.data,
+        f"{prefix}indices": matrix.indices,
+        f"{prefix}indptr": matrix.indptr,
+        f"{prefix}shape": np.array(matrix.shape, dtype=np.int64),
+    }
+
+
+def _csr_matrix(stored, prefix, size):
+    """
+    Rebuilds a square CSR matrix saved by _csr_arrays, padded to ``size`` x ``size``.
+    """
+    matrix = sparse.csr_matrix(
+        (stored[f"{prefix}data"], stored[f"{prefix}indices"], stored[f"{prefix}indptr"]),
+        shape=tuple(stored[f"{prefix}shape"].tolist()),
+    )
+    if matrix.shape[0] < size:
+        # Products first seen after this matrix was written are appended at the end of the axis.
+        matrix.resize((size, size))
+    return matrix
+
+
+def save_index(product_ids, neighbors, scores, popularity, watermark, delta=None, delta_base=None):
+    """
+    Atomically replaces the on-disk index so serving processes never read a partial file.
+
+    ``delta`` holds the co-occurrence counts pending on top of the base matrix
+    saved at watermark ``delta_base`` (none: the base already covers ``watermark``).
+    """
+    path = index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name("index.tmp.npz")
+    if delta is None:
+        delta = sparse.csr_matrix((len(product_ids), len(product_ids)), dtype=np.float32)
+        delta_base = watermark
+    np.savez(
+        tmp_path, product_ids=product_ids, neighbors=neighbors, scores=scores,
+        popularity=popularity, watermark=np.int64(watermark), delta_base=np.int64(delta_base),
+        **_csr_arrays("delta_", delta),
+    )
+    os.replace(tmp_path, path)
+    invalidate("recommendations")
+
+
+def _save_cooccurrence(matrix, watermark):
+    path = index_path().with_name("cooccurrence.npz")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name("cooccurrence.tmp.npz")
+    np.savez(tmp_path, watermark=np.int64(watermark), **_csr_arrays("", matrix))
+    os.replace(tmp_path, path)
+
+
+def _load_cooccurrence():
+    """
+    Loads the base co-occurrence matrix and the watermark it covers, or
+    ``(None, None)`` if there is none (or only one saved without a watermark).
+    """
+    path = index_path().with_name("cooccurrence.npz")
+    if not path.exists():
+        return None, None
+    with np.load(path) as stored:
+        if "watermark" not in stored.files:
+            return None, None
+        return _csr_matrix(stored, "", 0), int(stored["watermark"])
+
+
+def _load_index():
+    with np.load(index_path()) as stored:
+        return {name: stored[name] for name in stored.files}
+
+
+def _pending_delta(index, base_watermark):
+    """
+    Returns the index's pending counts if they apply on top of the base matrix,
+    an empty delta if the base already includes them (a compaction stopped
+    before rewriting the index), or None if the two files disagree (a rebuild
+    stopped between them) and the index must be rebuilt.
+    """
+    size = len(index["product_ids"])
+    if "delta_base" in index and int(index["delta_base"]) == base_watermark:
+        return _csr_matrix(index, "delta_", size)
+    if int(index["watermark"]) == base_watermark:
+        return sparse.csr_matrix((size, size), dtype=np.float32)
+    return None
+
+
+def _latest_order_item_id():
+    return OrderItem.objects.aggregate(latest=Max("id"))["latest"] or 0
+
+
+def build_recommendation_index(top_k=DEFAULT_TOP_K):
+    """
+    Rebuilds the item-item neighbour index from all order history, replacing
+    the stored base co-occurrence matrix and discarding pending deltas.
+
+    Returns:
+        int: The number of products in the index.
+    """
+    started = time.perf_counter()
+    watermark = _latest_order_item_id()
+    matrix, product_ids = purchase_matrix(upto=watermark)
+    loaded = time.perf_counter()
+
+    cooccurrence = (matrix.T @ matrix).tocsr()
+    neighbors, scores = top_k_neighbors(cosine_similarity(cooccurrence), top_k)
+    popularity = cooccurrence.diagonal().astype(np.int64)
+    computed = time.perf_counter()
+
+    _save_cooccurrence(cooccurrence, watermark)
+    save_index(product_ids, neighbors, scores, popularity, watermark)
+    # Left behind by versions that kept the pending counts in a separate file.
+    index_path().with_name("delta.npz").unlink(missing_ok=True)
+    print(
+        f"✅ Recommendation index built for {len(product_ids)} products from {matrix.nnz} purchases: "
+        f"load {loaded - started:.2f}s, compute {computed - loaded:.2f}s."
+    )
+    return len(product_ids)
+
+
+def _basket_matrices(events, product_positions, watermark, chunk_size=1000):
+    """
+    Builds aligned customers x products matrices of what each customer in
+    ``events`` had bought up to ``watermark`` (``old``) and newly bought (``new``).
+    """
+    customers = np.unique(events[:, 0])
+    rows = {customer: row for row, customer in enumerate(customers.tolist())}
+    size = len(product_positions)
+    previous = []
+    for offset in range(0, len(customers), chunk_size):
+        previous.extend(
+            OrderItem.objects.filter(
+                order__customer_id__in=customers[offset:offset + chunk_size].tolist(),
+                id__lte=watermark,
+            )
+            .exclude(order__status="Cancelled")
+            .values_list("order__customer_id", "product_id")
+            .distinct()
+        )
+    previous = np.array(previous, dtype=np.int64).reshape(-1, 2)
+    # Purchases the base matrix never saw (e.g. an order that was un-cancelled)
+    # wait for the next full rebuild.
+    previous = previous[np.isin(previous[:, 1], list(product_positions))]
+
+    def to_matrix(pairs):
+        return sparse.csr_matrix(
+            (
+                np.ones(len(pairs), dtype=np.float32),
+                ([rows[c] for c in pairs[:, 0].tolist()], [product_positions[p] for p in pairs[:, 1].tolist()]),
+            ),
+            shape=(len(customers), size),
+        )
+
+    old = to_matrix(previous)
+    old.data[:] = 1  # duplicate (customer, product) pairs collapse to one purchase
+    combined = to_matrix(np.vstack([previous, events]))
+    combined.data[:] = 1
+    new = combined - old
+    new.eliminate_zeros()
+    return old, new
+
+
+def update_recommendation_index():
+    """
+    Folds order items created since the index watermark into the stored
+    co-occurrence counts and re-ranks only the products whose similarities
+    changed. Pending counts are kept in a delta matrix saved with the index
+    until compact_recommendation_index() merges them into the base one.
+
+    Returns:
+        int: The number of re-ranked products.
+    """
+    if not index_path().exists():
+        build_recommendation_index()
+        return 0
+
+    started = time.perf_counter()
+    index = _load_index()
+    base, base_watermark = _load_cooccurrence()
+    pending = None if base is None else _pending_delta(index, base_watermark)
+    if pending is None:
+        build_recommendation_index(top_k=index["neighbors"].shape[1])
+        return 0
+    watermark = int(index["watermark"])
+    latest = _latest_order_item_id()
+    events = np.array(
+        list(
+            OrderItem.objects.filter(id__gt=watermark, id__lte=latest)
+            .exclude(order__status="Cancelled")
+            .values_list("order__customer_id", "product_id")
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    if not len(events):
+        return 0
+
+    product_ids = index["product_ids"]
+    new_products = np.setdiff1d(events[:, 1], product_ids)
+    product_ids = np.concatenate([product_ids, new_products])
+    product_positions = {pk: position for position, pk in enumerate(product_ids.tolist())}
+    size = len(product_ids)
+
+    old, new = _basket_matrices(events, product_positions, watermark)
+    delta = (new.T @ old + old.T @ new + new.T @ new).tocsr()
+    delta.eliminate_zeros()
+    pending.resize((size, size))
+    pending = (pending + delta).tocsr()
+    base.resize((size, size))
+    cooccurrence = (base + pending).tocsr()
+    loaded = time.perf_counter()
+
+    # A product's similarities change when its own count changes, and so do
+    # those of every product it co-occurs with.
+    changed = np.flatnonzero(np.diff(delta.indptr))
+    affected = np.union1d(changed, cooccurrence[changed].indices)
+
+    counts = cooccurrence.diagonal()
+    inverse_norm = 1 / np.sqrt(np.maximum(counts, 1))
+    rows = (sparse.diags(inverse_norm[affected]) @ cooccurrence[affected] @ sparse.diags(inverse_norm)).tocoo()
+    keep = rows.col != affected[rows.row]
+    rows = sparse.csr_matrix((rows.data[keep], (rows.row[keep], rows.col[keep])), shape=rows.shape)
+
+    top_k = index["neighbors"].shape[1]
+    neighbors = np.vstack([index["neighbors"], np.full((len(new_products), top_k), -1, dtype=np.int32)])
+    scores = np.vstack([index["scores"], np.zeros((len(new_products), top_k), dtype=np.float32)])
+    neighbors[affected], scores[affected] = top_k_neighbors(rows, top_k)
+    computed = time.perf_counter()
+
+    save_index(product_ids, neighbors, scores, counts.astype(np.int64), latest, pending, base_watermark)
+    print(
+        f"✅ Recommendation index updated with {len(events)} order items: re-ranked {len(affected)} of "
+        f"{size} products, load {loaded - started:.2f}s, compute {computed - loaded:.2f}s."
+    )
+    return len(affected)
+
+
+def compact_recommendation_index():
+    """
+    Merges the pending delta counts into the base co-occurrence matrix. The
+    merged base is saved first, under the index watermark, so an interrupted
+    compaction is detected (and finished) by the next update instead of
+    counting the delta twice.
+    """
+    if not index_path().exists():
+        return
+    index = _load_index()
+    base, base_watermark = _load_cooccurrence()
+    pending = None if base is None else _pending_delta(index, base_watermark)
+    if pending is None or not pending.nnz:
+        return
+    size = len(index["product_ids"])
+    base.resize((size, size))
+    watermark = int(index["watermark"])
+    _save_cooccurrence(base + pending, watermark)
+    save_index(index["product_ids"], index["neighbors"], index["scores"], index["popularity"], watermark)
+
+
+class RecommendationIndex:
+    """
+    In-memory view of the on-disk neighbour index, reloaded when the file changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def get(self):
+        """
+        Returns the index arrays as a dict, or None if no index has been built.
+        """
+        if time.monotonic() - self._checked_at > INDEX_RELOAD_INTERVAL or self._data is None:
+            with self._lock:
+                self._checked_at = time.monotonic()
+                path = index_path()
+                mtime = path.stat().st_mtime if path.exists() else None
+                if mtime is not None and mtime != self._mtime:
+                    with np.load(path) as stored:
+                        # The pending co-occurrence counts are only needed by updates.
+                        self._data = {name: stored[name] for name in stored.files if not name.startswith("delta_")}
+                    self._data["top_popular"] = np.argsort(-self._data["popularity"], kind="stable")[:100]
+                    self._mtime = mtime
+        return self._data
+
+    def reset(self):
+        with self._lock:
+            self._data, self._mtime, self._checked_at = None, None, 0.0
+
+
+recommendation_index = RecommendationIndex()
+
+
+def recommend_products(customer_id, limit=3):
+    """
+    Recommends products for a customer by summing the similarity of the
+    neighbours of everything they have bought, excluding what they already own.
+    Customers without history get the most popular products.
+
+    Returns:
+        list: [{"product_id", "name", "score"}, ...] best first.
+    """
+    index = recommendation_index.get()
+    if index is None:
+        return []
+    purchased = np.fromiter(purchased_products(customer_id), dtype=np.int64)
+    ranked = rank_products(index, purchased, limit)
+    names = dict(Product.objects.filter(id__in=[pk for pk, _ in ranked]).values_list("id", "name"))
+    return [
+        {"product_id": pk, "name": names.get(pk), "score": round(score, 4)}
+        for pk, score in ranked
+    ]
+
+
+def purchased_products(customer_id):
+    # Cancelled orders are left out of the index too, so they do not count as owned.
+    return (
+        OrderItem.objects.filter(order__customer_id=customer_id)
+        .exclude(order__status="Cancelled")
+        .values_list("product_id", flat=True)
+        .distinct()
+    )
+
+
+def rank_products(index, purchased, limit):
+    """
+    Ranks recommendations for the ``purchased`` product ids (pure NumPy, no queries).
+
+    Returns:
+        list: [(product_id, score), ...] best first.
+    """
+    product_ids = index["product_ids"]
+    owned = np.isin(product_ids, purchased)
+    positions = np.flatnonzero(owned)
+
+    ranked = []
+    if len(positions):
+        candidates = index["neighbors"][positions].ravel()
+        weights = index["scores"][positions].ravel()
+        valid = candidates >= 0
+        candidates, weights = candidates[valid], weights[valid]
+        valid = ~owned[candidates]
+        candidates, inverse = np.unique(candidates[valid], return_inverse=True)
+        totals = np.bincount(inverse, weights=weights[valid])
+        best = np.argsort(-totals)[:limit]
+        ranked = [(int(product_ids[candidates[i]]), float(totals[i])) for i in best]
+
+    if len(ranked) < limit:
+        seen = {pk for pk, _ in ranked}
+        for column in index["top_popular"]:
+            pk = int(product_ids[column])
+            if pk in seen or owned[column]:
+                continue
+            ranked.append((pk, 0.0))
+            seen.add(pk)
+            if len(ranked) == limit:
+                break
+    return ranked
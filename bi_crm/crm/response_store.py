@@ -0,0 +1,111 @@
+import gzip
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+# --------------------------
+# Raw Scraper Response Store
+# --------------------------
+# Every raw API response is appended to gzip-compressed NDJSON segments under
+# settings.SCRAPE_CACHE_DIR. Each record is written as its own gzip member, so
+# a segment can be streamed end-to-end with gzip.open() and a single record can
+# be read by seeking straight to its offset. index.tsv maps every record to
+# (asin, fetched_at, segment, offset).
+
+SEGMENT_PATTERN = "segment-*.ndjson.gz"
+INDEX_FILE = "index.tsv"
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResponseStore:
+    """
+    Append-only, compressed store of raw product API responses.
+    """
+
+    def __init__(self, root=None, segment_max_bytes=DEFAULT_SEGMENT_MAX_BYTES):
+        self.root = Path(root or settings.SCRAPE_CACHE_DIR)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._segment = None
+        self._index = None
+
+    def _segments(self):
+        return sorted(self.root.glob(SEGMENT_PATTERN))
+
+    def _open_for_append(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        path = segments[-1] if segments else None
+        if path is None or path.stat().st_size >= self.segment_max_bytes:
+            number = int(path.name.split("-")[1].split(".")[0]) + 1 if path else 1
+            path = self.root / f"segment-{number:06d}.ndjson.gz"
+        self._segment = open(path, "ab")
+        if self._index is None:
+            self._index = open(self.root / INDEX_FILE, "a", encoding="utf-8")
+
+    def append(self, asin, response, fetched_at=None):
+        """
+        Appends one raw response. Safe to call from several threads.
+        """
+        fetched_at = fetched_at or timezone.now()
+        line = json.dumps({"asin": asin, "fetched_at": fetched_at.isoformat(), "response": response}) + "\n"
+        member = gzip.compress(line.encode("utf-8"))
+
+        with self._lock:
+            if self._segment is None or self._segment.tell() >= self.segment_max_bytes:
+                self.close()
+                self._open_for_append()
+            offset = self._segment.tell()
+            self._segment.write(member)
+            self._index.write(f"{asin}\t{fetched_at.isoformat()}\t{Path(self._segment.name).name}\t{offset}\n")
+
+    def close(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def iter_records(self):
+        """
+        Streams every stored record in append order as
+        ``(asin, fetched_at, response)`` without loading segments into memory.
+        A segment whose last member was cut short (e.g. by a crash mid-append)
+        is read up to its last complete record.
+        """
+        for path in self._segments():
+            with gzip.open(path, "rt", encoding="utf-8") as segment:
+                lines = iter(segment)
+                while True:
+                    try:
+                        line = next(lines)
+                    except StopIteration:
+                        break
+                    except EOFError:
+                        print(f"⚠️ Skipping the truncated last record of {path.name}.")
+                        break
+                    record = json.loads(line)
+                    yield record["asin"], datetime.fromisoformat(record["fetched_at"]), record["response"]
+
+    def iter_index(self):
+        """
+        Streams index entries as ``(asin, fetched_at, segment, offset)``.
+        """
+        index_path = self.root / INDEX_FILE
+        if not index_path.exists():
+            return
+        with open(index_path, encoding="utf-8") as index:
+            for line in index:
+                asin, fetched_at, segment, offset = line.rstrip("\n").split("\t")
+                yield asin, datetime.fromisoformat(fetched_at), segment, int(offset)
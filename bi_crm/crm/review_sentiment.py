@@ -0,0 +1,124 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Q
+from django.utils import timezone
+
+from .models import JobWatermark, Product, Review
+from .sentiment import analyze_sentiment, sentiment_cache
+
+# --------------------------
+# Review Sentiment Scoring
+# --------------------------
+# Reviews are streamed in (updated_at, id) order from a JobWatermark, so each
+# run only reads reviews created or edited since the last one. Comments not in
+# the sentiment cache are analysed across a process pool; scores are written
+# back with bulk_update (which leaves updated_at alone, so scoring never
+# re-queues a review), and the mean sentiment of every affected product is
+# refreshed in Product.review_sentiment for the sales forecaster. Each chunk
+# and its watermark advance commit together, so an interrupted run resumes
+# where it stopped. Deleted reviews are only reflected by a --rescore run,
+# which also clears the mean of products that no longer have scored reviews.
+
+REVIEW_WATERMARK = "review_sentiment"
+DEFAULT_REVIEW_CHUNK_SIZE = 2000
+# Reviews saved within this window are left for the next run, so a review
+# committed late with a slightly older updated_at is not skipped.
+SETTLE_DELAY = timedelta(seconds=30)
+
+
+def pending_reviews(watermark, until, chunk_size=DEFAULT_REVIEW_CHUNK_SIZE):
+    """
+    The next ``(id, product_id, comment, updated_at)`` rows after the watermark.
+    """
+    reviews = Review.objects.filter(updated_at__lte=until)
+    if watermark.last_seen_at is not None:
+        after = (
+            Q(updated_at__gt=watermark.last_seen_at)
+            | Q(updated_at=watermark.last_seen_at, id__gt=watermark.last_id)
+        )
+        # The redundant bound lets the database seek into the (updated_at, id) index.
+        reviews = reviews.filter(after, updated_at__gte=watermark.last_seen_at)
+    return list(
+        reviews.order_by("updated_at", "id").values_list("id", "product_id", "comment", "updated_at")[:chunk_size]
+    )
+
+
+def update_product_sentiment(product_ids):
+    """
+    Recomputes Product.review_sentiment for ``product_ids`` from their scored reviews.
+    """
+    means = dict(
+        Review.objects.filter(product_id__in=product_ids, sentiment_score__isnull=False)
+        .values("product_id")
+        .annotate(mean=Avg("sentiment_score"))
+        .values_list("product_id", "mean")
+    )
+    Product.objects.bulk_update(
+        [
+            Product(id=pk, review_sentiment=None if means.get(pk) is None else round(float(means[pk]), 4))
+            for pk in product_ids
+        ],
+        ["review_sentiment"],
+    )
+
+
+def score_reviews(chunk_size=DEFAULT_REVIEW_CHUNK_SIZE, workers=None, rescore=False):
+    """
+    Scores every review created or edited since the last run (all reviews
+    with ``rescore``) and refreshes the affected products' mean sentiment.
+
+    Returns:
+        int: The number of reviews scored.
+    """
+    workers = workers or os.cpu_count()
+    until = timezone.now() - SETTLE_DELAY
+    if rescore:
+        JobWatermark.objects.filter(name=REVIEW_WATERMARK).delete()
+
+    started = time.perf_counter()
+    misses_before = sentiment_cache.misses
+    scored = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def analyze_in_pool(texts):
+            chunksize = max(1, len(texts) // (4 * workers))
+            return list(pool.map(analyze_sentiment, texts, chunksize=chunksize))
+
+        while True:
+            with transaction.atomic():
+                watermark, _ = JobWatermark.objects.select_for_update().get_or_create(name=REVIEW_WATERMARK)
+                rows = pending_reviews(watermark, until, chunk_size)
+                if not rows:
+                    break
+                sentiments = sentiment_cache.get_many(
+                    [comment for _, _, comment, _ in rows if comment], analyzer=analyze_in_pool
+                )
+                Review.objects.bulk_update(
+                    [
+                        Review(id=pk, sentiment_score=round(sentiments[comment][0], 2) if comment else None)
+                        for pk, _, comment, _ in rows
+                    ],
+                    ["sentiment_score"],
+                )
+                update_product_sentiment(sorted({product_id for _, product_id, _, _ in rows}))
+                watermark.last_id, watermark.last_seen_at = rows[-1][0], rows[-1][3]
+                watermark.save(update_fields=["last_id", "last_seen_at", "updated_at"])
+            scored += len(rows)
+
+    if rescore:
+        Product.objects.filter(review_sentiment__isnull=False).exclude(
+            reviews__sentiment_score__isnull=False
+        ).update(review_sentiment=None)
+
+    elapsed = time.perf_counter() - started
+    rate = scored / elapsed if elapsed > 0 else 0.0
+    print(
+        f"✅ Scored {scored} reviews ({sentiment_cache.misses - misses_before} analysed, the rest from the "
+        f"sentiment cache) in {elapsed:.2f}s: {rate:,.0f} reviews/s, {rate / workers:,.0f} reviews/s/core "
+        f"over {workers} workers."
+    )
+    return scored
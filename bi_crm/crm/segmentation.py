@@ -0,0 +1,271 @@
+import time
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from . import model_registry
+from .caching import invalidate
+from .models import Customer, CustomerSegment, JobWatermark, Order
+
+# --------------------------
+# RFM Customer Segmentation
+# --------------------------
+# Recency (days since the last order), frequency (number of orders) and
+# monetary value (total spent) come from one GROUP BY over non-cancelled
+# orders, streamed into NumPy arrays. Customers are then either binned into
+# RFM quintiles and named by rules, or clustered with MiniBatchKMeans. The fitted
+# binning (quintile edges or cluster model) is saved to the model registry, so
+# an incremental run can place customers with new orders on the same scale
+# without re-reading everyone. Recency keeps ageing for customers who do not
+# order, and cancellations do not move the order watermark, so a periodic full
+# run is still needed to keep every segment current.
+
+SEGMENTATION_MODEL_NAME = "rfm_segmentation"
+SEGMENTATION_WATERMARK = "customer_segmentation"
+METHODS = ("quantile", "kmeans")
+DEFAULT_SEGMENTATION_CHUNK_SIZE = 10_000
+DEFAULT_CLUSTERS = 6
+
+NO_ORDERS_SEGMENT = ("No Orders", "Registered customers who have not completed an order yet.")
+
+# Quintile rules, first match wins. r/f/m are 1 (worst) .. 5 (best) scores;
+# ``orders`` is the raw order count.
+QUANTILE_SEGMENTS = [
+    ("VIP Customer", "Ordered recently, orders often and spends the most.",
+     lambda r, f, m, orders: (r >= 4) & (f >= 4) & (m >= 4)),
+    ("Inactive Customer", "Has not ordered for much longer than most customers.",
+     lambda r, f, m, orders: r == 1),
+    ("Loyal Customer", "Orders more often than most customers.",
+     lambda r, f, m, orders: f >= 4),
+    ("High Value", "Spends more than most customers.",
+     lambda r, f, m, orders: m >= 4),
+    ("One-Time Buyer", "Has ordered exactly once.",
+     lambda r, f, m, orders: orders == 1),
+    ("Medium Value", "Average spend.",
+     lambda r, f, m, orders: m == 3),
+]
+DEFAULT_QUANTILE_SEGMENT = ("Low Value", "Spends less than most customers.")
+
+
+def rfm_rows(customer_ids=None):
+    """
+    The per-customer RFM aggregate as ``(customer_id, segment_id, last order,
+    orders, total spent)`` rows. ``customer_ids`` restricts it to some customers.
+    """
+    orders = Order.objects.exclude(status="Cancelled")
+    if customer_ids is not None:
+        orders = orders.filter(customer_id__in=customer_ids)
+    return (
+        orders.values("customer_id", "customer__segment_id")
+        .annotate(last_order=Max("order_date"), orders=Count("id"), spent=Sum("total_amount"))
+        .order_by("customer_id")
+        .values_list("customer_id", "customer__segment_id", "last_order", "orders", "spent")
+    )
+
+
+def load_rfm(rows, chunk_size=DEFAULT_SEGMENTATION_CHUNK_SIZE):
+    """
+    Streams RFM rows into arrays: ``ids``, ``segment_ids`` (-1 if unsegmented),
+    ``recency`` (days), ``frequency`` and ``monetary``.
+    """
+    now = timezone.now()
+    dtypes = {"ids": np.int64, "segment_ids": np.int64, "recency": np.float64, "frequency": np.int64, "monetary": np.float64}
+    blocks = {name: [] for name in dtypes}
+    chunk = []
+
+    def flush():
+        ids, segment_ids, last_orders, orders, spent = zip(*chunk)
+        blocks["ids"].append(np.array(ids, dtype=dtypes["ids"]))
+        blocks["segment_ids"].append(np.array([-1 if pk is None else pk for pk in segment_ids], dtype=dtypes["segment_ids"]))
+        blocks["recency"].append(np.array([(now - last).total_seconds() / 86400 for last in last_orders]))
+        blocks["frequency"].append(np.array(orders, dtype=dtypes["frequency"]))
+        blocks["monetary"].append(np.array([float(value or 0) for value in spent]))
+        chunk.clear()
+
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name])
+        for name, parts in blocks.items()
+    }
+
+
+def _scores(values, edges):
+    """
+    Scores values 1..5 by the number of quintile edges strictly below them. Tied
+    values take the lower bin, so when most customers share a value (one order,
+    say) and the edges collapse onto it, they score 1 rather than 5.
+    """
+    return np.searchsorted(edges, values, side="left") + 1
+
+
+def quantile_labels(rfm, edges):
+    """
+    Returns each customer's index into QUANTILE_SEGMENTS (len() for the default segment).
+    """
+    # Lower recency is better, so it is scored on its negation (ties still take the lower score).
+    r = _scores(-rfm["recency"], -edges["recency"][::-1])
+    f = _scores(rfm["frequency"], edges["frequency"])
+    m = _scores(rfm["monetary"], edges["monetary"])
+    conditions = [rule(r, f, m, rfm["frequency"]) for _, _, rule in QUANTILE_SEGMENTS]
+    return np.select(conditions, np.arange(len(QUANTILE_SEGMENTS)), default=len(QUANTILE_SEGMENTS))
+
+
+def _features(rfm):
+    # Order counts and spend are heavy-tailed; logs keep a few whales from dominating the clusters.
+    return np.column_stack((rfm["recency"], np.log1p(rfm["frequency"]), np.log1p(rfm["monetary"])))
+
+
+def fit_segmentation(rfm, method="quantile", clusters=DEFAULT_CLUSTERS, chunk_size=DEFAULT_SEGMENTATION_CHUNK_SIZE):
+    """
+    Fits the binning for ``method`` on the full RFM arrays.
+
+    Returns:
+        dict: The artifact saved to the model registry, including ``segments``,
+        the ordered (name, description) of every label.
+    """
+    if method == "quantile":
+        quintiles = [0.2, 0.4, 0.6, 0.8]
+        return {
+            "method": method,
+            "edges": {name: np.quantile(rfm[name], quintiles) for name in ("recency", "frequency", "monetary")},
+            "segments": [(name, description) for name, description, _ in QUANTILE_SEGMENTS] + [DEFAULT_QUANTILE_SEGMENT],
+        }
+
+    features = _features(rfm)
+    scaler = StandardScaler().fit(features)
+    model = MiniBatchKMeans(n_clusters=clusters, batch_size=chunk_size, n_init=3, random_state=42)
+    for offset in range(0, len(features), chunk_size):
+        model.partial_fit(scaler.transform(features[offset:offset + chunk_size]))
+
+    # Name clusters by value so the labels stay meaningful across refits.
+    centers = scaler.inverse_transform(model.cluster_centers_)
+    order = np.argsort(-centers[:, 2])
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    segments = [None] * clusters
+    for label, (recency, frequency, monetary) in enumerate(centers):
+        segments[rank[label]] = (
+            f"RFM Cluster {rank[label] + 1}",
+            f"Typically {recency:.0f} days since the last order, "
+            f"{np.expm1(frequency):.1f} orders and {np.expm1(monetary):,.2f} spent.",
+        )
+    return {"method": method, "model": model, "scaler": scaler, "rank": rank, "segments": segments}
+
+
+def predict_labels(artifact, rfm, chunk_size=DEFAULT_SEGMENTATION_CHUNK_SIZE):
+    if artifact["method"] == "quantile":
+        return quantile_labels(rfm, artifact["edges"])
+    features = _features(rfm)
+    labels = np.empty(len(features), dtype=np.int64)
+    for offset in range(0, len(features), chunk_size):
+        block = artifact["scaler"].transform(features[offset:offset + chunk_size])
+        labels[offset:offset + chunk_size] = artifact["rank"][artifact["model"].predict(block)]
+    return labels
+
+
+def _segment_ids(segments):
+    """
+    Maps (name, description) pairs to CustomerSegment ids, creating missing segments.
+    """
+    ids = []
+    for name, description in segments:
+        segment = CustomerSegment.objects.filter(name=name).order_by("id").first()
+        if segment is None:
+            segment = CustomerSegment.objects.create(name=name, description=description)
+        elif segment.description != description:
+            segment.description = description
+            segment.save(update_fields=["description"])
+        ids.append(segment.pk)
+    return np.array(ids, dtype=np.int64)
+
+
+def write_segments(customer_ids, current, assigned, chunk_size=DEFAULT_SEGMENTATION_CHUNK_SIZE):
+    """
+    Writes segment assignments that changed, one UPDATE per segment per chunk.
+
+    Returns:
+        int: The number of customers moved to a different segment.
+    """
+    changed = np.flatnonzero(current != assigned)
+    for offset in range(0, len(changed), chunk_size):
+        block = changed[offset:offset + chunk_size]
+        with transaction.atomic():
+            for segment_id in np.unique(assigned[block]):
+                Customer.objects.filter(
+                    id__in=customer_ids[block][assigned[block] == segment_id].tolist()
+                ).update(segment_id=int(segment_id))
+    return len(changed)
+
+
+def _check_fitted_options(artifact, method, clusters):
+    fitted_clusters = len(artifact["segments"]) if artifact["method"] == "kmeans" else None
+    if (method is not None and method != artifact["method"]) or (clusters is not None and clusters != fitted_clusters):
+        fitted = artifact["method"] + (f" with {fitted_clusters} clusters" if fitted_clusters else "")
+        raise ValueError(
+            f"The last full run fitted {fitted}; run without --incremental to refit with other options."
+        )
+
+
+def segment_customers(method=None, clusters=None, incremental=False, chunk_size=DEFAULT_SEGMENTATION_CHUNK_SIZE):
+    """
+    Assigns every customer (or, with ``incremental``, only customers with orders
+    placed since the last run) to an RFM segment. Incremental runs reuse the
+    binning of the last full run and fall back to a full run if there is none;
+    a ``method`` or ``clusters`` that differs from that binning is an error.
+    Full runs default to quantile binning and DEFAULT_CLUSTERS k-means clusters.
+
+    Returns:
+        dict: ``customers`` scored and ``changed`` assignments.
+    """
+    if method is not None and method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {METHODS}.")
+    started = time.perf_counter()
+    up_to = Order.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    watermark, _ = JobWatermark.objects.get_or_create(name=SEGMENTATION_WATERMARK)
+    artifact = model_registry.load_model(SEGMENTATION_MODEL_NAME) if incremental else None
+    if artifact is not None:
+        _check_fitted_options(artifact, method, clusters)
+
+    if artifact is None:
+        incremental = False
+        rfm = load_rfm(rfm_rows(), chunk_size)
+        if not len(rfm["ids"]):
+            print("⚠️ No orders to segment customers by.")
+            return {"customers": 0, "changed": 0}
+        artifact = fit_segmentation(rfm, method or "quantile", clusters or DEFAULT_CLUSTERS, chunk_size)
+        version = model_registry.save_model(SEGMENTATION_MODEL_NAME, artifact)
+        print(f"✅ Fitted {artifact['method']} RFM segmentation, registered as version {version}.")
+    else:
+        changed_customers = Order.objects.filter(id__gt=watermark.last_id, id__lte=up_to).values("customer_id")
+        rfm = load_rfm(rfm_rows(customer_ids=changed_customers), chunk_size)
+
+    segment_ids = _segment_ids(artifact["segments"])
+    assigned = segment_ids[predict_labels(artifact, rfm, chunk_size)]
+    changed = write_segments(rfm["ids"], rfm["segment_ids"], assigned, chunk_size)
+    if not incremental:
+        no_orders, _ = CustomerSegment.objects.get_or_create(
+            name=NO_ORDERS_SEGMENT[0], defaults={"description": NO_ORDERS_SEGMENT[1]}
+        )
+        ordered = Order.objects.exclude(status="Cancelled").values("customer_id")
+        changed += Customer.objects.exclude(id__in=ordered).exclude(segment=no_orders).update(segment=no_orders)
+
+    watermark.last_id = up_to
+    watermark.save(update_fields=["last_id", "updated_at"])
+    invalidate("customers")
+
+    elapsed = time.perf_counter() - started
+    rate = len(rfm["ids"]) / elapsed if elapsed > 0 else 0.0
+    print(
+        f"✅ Segmented {len(rfm['ids'])} customers ({'incremental' if incremental else 'full'}, "
+        f"{changed} changed) in {elapsed:.2f}s ({rate:,.0f} customers/s)."
+    )
+    return {"customers": len(rfm["ids"]), "changed": changed}
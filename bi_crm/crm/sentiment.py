@@ -0,0 +1,116 @@
+import hashlib
+import threading
+from importlib.metadata import version
+
+from textblob import TextBlob
+
+from .models import SentimentCacheEntry
+from .utils import LRUCache
+
+# --------------------------
+# Sentiment Cache
+# --------------------------
+# Cache keys combine the analyzer version with the text, so upgrading TextBlob
+# (or swapping the analyzer) naturally invalidates every stored score.
+ANALYZER_VERSION = f"textblob-{version('textblob')}"
+
+
+def sentiment_key(text):
+    """
+    Returns the content-addressed cache key for ``text`` under the current analyzer.
+    """
+    return hashlib.sha256(f"{ANALYZER_VERSION}\0{text}".encode("utf-8")).hexdigest()
+
+
+def analyze_sentiment(text):
+    """
+    Runs the (slow) NLP analyzer and returns ``(polarity, subjectivity)``.
+    """
+    sentiment = TextBlob(text).sentiment
+    return sentiment.polarity, sentiment.subjectivity
+
+
+class SentimentCache:
+    """
+    Two-level cache of sentiment scores: an in-process LRU in front of the
+    persistent SentimentCacheEntry table. Unchanged text is only ever analysed once.
+    """
+
+    def __init__(self, maxsize=50_000):
+        self._memory = LRUCache(maxsize)
+        self._stats_lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        """
+        Returns ``(polarity, subjectivity)`` for one text.
+        """
+        return self.get_many([text])[text]
+
+    def polarity(self, text):
+        return self.get(text)[0] if text else 0.0
+
+    def get_many(self, texts, analyzer=None):
+        """
+        Resolves sentiment for many texts at once: one DB query for everything
+        missing from memory, and ``analyzer`` (default: analyse one by one
+        in-process) for everything missing from the DB. ``analyzer`` receives
+        a list of texts and must return a list of ``(polarity, subjectivity)``.
+
+        Returns:
+            dict: {text: (polarity, subjectivity)}
+        """
+        results = {}
+        missing = {}
+        for text in set(texts):
+            key = sentiment_key(text)
+            cached = self._memory.get(key)
+            if cached is None:
+                missing[key] = text
+            else:
+                results[text] = cached
+        memory_hits = len(results)
+
+        stored = SentimentCacheEntry.objects.filter(key__in=missing).values_list("key", "polarity", "subjectivity")
+        for key, polarity, subjectivity in stored:
+            text = missing.pop(key)
+            results[text] = (polarity, subjectivity)
+            self._memory.set(key, results[text])
+        db_hits = len(results) - memory_hits
+
+        if missing:
+            keys, pending = zip(*missing.items())
+            scores = (analyzer or _analyze_all)(list(pending))
+            new_entries = []
+            for key, text, (polarity, subjectivity) in zip(keys, pending, scores):
+                results[text] = (polarity, subjectivity)
+                self._memory.set(key, results[text])
+                new_entries.append(SentimentCacheEntry(key=key, polarity=polarity, subjectivity=subjectivity))
+            SentimentCacheEntry.objects.bulk_create(new_entries, ignore_conflicts=True)
+
+        with self._stats_lock:
+            self.memory_hits += memory_hits
+            self.db_hits += db_hits
+            self.misses += len(missing)
+        return results
+
+    def stats(self):
+        """
+        Returns lookup counters and the overall hit rate since the process started.
+        """
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0,
+        }
+
+
+def _analyze_all(texts):
+    return [analyze_sentiment(text) for text in texts]
+
+
+sentiment_cache = SentimentCache()
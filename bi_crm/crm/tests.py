@@ -1,3 +1,1064 @@
-from django.test import TestCase
+import asyncio
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .backtesting import backtest_sales_forecasts
+from .caching import generations
+from .dashboard import refresh_dashboard
+from .forecasting import forecast_timeseries, period_ordinals, period_starts
+from .management.commands.load_test import run_load
+from .management.commands.scrape_products import ProductBatchWriter, select_refresh_asins
+from . import ml_models, model_registry, pricing, recommendations, review_sentiment
+from .ml_models import parse_sales_volume, parse_sales_volumes
+from .models import (
+    ChurnPrediction, Customer, CustomerSegment, DailyPriceRollup, JobWatermark, Order, OrderItem, PriceHistory, Product,
+    Review, SalesForecast, SentimentCacheEntry,
+)
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .response_store import ResponseStore
+from .segmentation import QUANTILE_SEGMENTS, fit_segmentation, predict_labels
+from .sentiment import SentimentCache, sentiment_key
+from .utils import LRUCache
+from .views import MAX_CHURN_BATCH
+
+
+def create_sale(product, quantity=3, days_ago=40, customer="ada"):
+    """
+    Records one completed order line for ``product`` placed ``days_ago`` days ago.
+    """
+    customer, _ = Customer.objects.get_or_create(
+        email=f"{customer}@example.com", defaults={"first_name": customer.title(), "last_name": "Example"}
+    )
+    order = Order.objects.create(
+        order_number=f"A-{Order.objects.count() + 1}", customer=customer, total_amount=quantity * 10, status="Completed"
+    )
+    Order.objects.filter(pk=order.pk).update(order_date=timezone.now() - timedelta(days=days_ago))
+    OrderItem.objects.create(order=order, product=product, quantity=quantity, price_at_purchase=10)
+
+
+class RFMSegmentationTests(TestCase):
+    def _rfm(self, frequency, seed=0):
+        rng = np.random.default_rng(seed)
+        size = len(frequency)
+        return {
+            "recency": rng.uniform(0, 365, size),
+            "frequency": np.asarray(frequency, dtype=np.int64),
+            "monetary": rng.uniform(10, 500, size),
+        }
+
+    def test_tied_frequencies_take_the_lowest_score(self):
+        # 85% of customers have exactly one order, so every frequency edge is 1.
+        frequency = np.ones(1000, dtype=np.int64)
+        frequency[850:] = np.arange(2, 152)
+        rfm = self._rfm(frequency)
+        artifact = fit_segmentation(rfm, "quantile")
+        self.assertTrue((artifact["edges"]["frequency"] == 1).all())
+
+        names = [name for name, _ in artifact["segments"]]
+        labels = np.array(names)[predict_labels(artifact, rfm)]
+        one_time = labels[:850]
+        self.assertNotIn("Loyal Customer", one_time)
+        self.assertNotIn("VIP Customer", one_time)
+        self.assertIn("One-Time Buyer", one_time)
+        # Repeat buyers are above every edge and rank as frequent.
+        self.assertNotIn("One-Time Buyer", labels[850:])
+
+    def test_most_recent_customers_score_best_on_recency(self):
+        rfm = self._rfm(np.ones(100, dtype=np.int64))
+        rfm["recency"] = np.arange(100, dtype=np.float64)
+        artifact = fit_segmentation(rfm, "quantile")
+        labels = predict_labels(artifact, rfm)
+        inactive = [name for name, _, _ in QUANTILE_SEGMENTS].index("Inactive Customer")
+        self.assertTrue((labels[80:] == inactive).all())
+        self.assertFalse((labels[:80] == inactive).any())
+
+    def test_incremental_runs_reject_options_that_differ_from_the_fitted_binning(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        settings = override_settings(ML_MODEL_DIR=location)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(model_registry.clear_cache)
+        product = Product.objects.create(name="Kettle")
+        for quantity, customer in ((1, "ada"), (5, "bob"), (20, "cy")):
+            create_sale(product, quantity=quantity, customer=customer)
+
+        def segment(*args):
+            with redirect_stdout(StringIO()):
+                call_command("segment_customers", *args, stdout=StringIO())
+
+        segment("--method", "kmeans", "--clusters", "2")
+        for options in (["--method", "quantile"], ["--clusters", "3"]):
+            with self.subTest(options=options), self.assertRaisesMessage(CommandError, "fitted kmeans with 2 clusters"):
+                segment("--incremental", *options)
+        segment("--incremental")
+        segment("--incremental", "--method", "kmeans", "--clusters", "2")
+        self.assertEqual(
+            set(Customer.objects.values_list("segment__name", flat=True)), {"RFM Cluster 1", "RFM Cluster 2"}
+        )
+
+
+class SalesVolumeParsingTests(TestCase):
+    CASES = {
+        "400+ bought in past month": 400,
+        "1K+ bought in past month": 1_000,
+        "1.5M+ views": 1_500_000,
+        "2,500 sold": 2_500,
+        "1 more option": 1,
+        "5 months": 5,
+        "3 Models available": 3,
+        "12mo warranty": 12,
+        "no number": None,
+        "": None,
+        None: None,
+    }
+
+    def test_parse_sales_volume(self):
+        for text, expected in self.CASES.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_sales_volume(text), expected)
+
+    def test_vectorised_parse_matches_scalar_parse(self):
+        parsed = parse_sales_volumes(pd.Series(list(self.CASES)))
+        for (text, expected), value in zip(self.CASES.items(), parsed):
+            with self.subTest(text=text):
+                self.assertEqual(None if pd.isna(value) else value, expected)
+
+
+class BackfillSalesVolumeUnitsTests(TestCase):
+    def test_backfill_parses_missing_and_misparsed_units(self):
+        migration = import_module("crm.migrations.0017_backfill_sales_volume_units")
+        Product.objects.bulk_create([
+            Product(name="unparsed", sales_volume="1K+ bought in past month"),
+            Product(name="misparsed", sales_volume="5 months", sales_volume_units=5_000_000),
+            Product(name="no volume"),
+        ])
+        migration.backfill_units(apps, None)
+        units = dict(Product.objects.values_list("name", "sales_volume_units"))
+        self.assertEqual(units, {"unparsed": 1_000, "misparsed": 5, "no volume": None})
+        for text in SalesVolumeParsingTests.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(migration.parse_sales_volume(text), parse_sales_volume(text))
+
+
+class SalesForecastStorageTests(TestCase):
+    def test_methods_and_measures_do_not_overwrite_each_other(self):
+        product = Product.objects.create(name="Kettle")
+        create_sale(product)
+
+        runs = [("holt", "quantity"), ("holt", "revenue"), ("seasonal-naive", "quantity")]
+        with redirect_stdout(StringIO()):
+            for method, measure in runs:
+                forecast_timeseries(method=method, period="Monthly", horizon=1, history=3, measure=measure)
+                # Re-running a method upserts its own row instead of adding one.
+                forecast_timeseries(method=method, period="Monthly", horizon=1, history=3, measure=measure)
+
+        stored = set(SalesForecast.objects.filter(product=product).values_list("method", "measure"))
+        self.assertEqual(stored, set(runs))
+        self.assertEqual(SalesForecast.objects.filter(product=product).count(), len(runs))
+
+
+class ProductBatchWriterTests(TestCase):
+    def _payload(self, asin, **extra):
+        return {"asin": asin, "product_title": f"Product {asin}", "product_price": "$10.00", **extra}
+
+    def test_a_bad_payload_only_loses_its_own_row(self):
+        writer = ProductBatchWriter(batch_size=10)
+        with redirect_stdout(StringIO()) as output:
+            writer.add(self._payload("GOOD1"))
+            # A negative count violates the PositiveIntegerField check and fails the batch upsert.
+            writer.add(self._payload("BAD", product_num_ratings=-1))
+            writer.add(self._payload("GOOD2"))
+            writer.close()
+
+        self.assertIn("Error writing ASIN BAD", output.getvalue())
+        self.assertEqual((writer.inserted, writer.updated, writer.unchanged, writer.failed), (2, 0, 0, 1))
+        self.assertEqual(set(Product.objects.values_list("asin", flat=True)), {"GOOD1", "GOOD2"})
+        self.assertEqual(PriceHistory.objects.count(), 2)
+
+    def test_counts_inserted_updated_and_unchanged_rows(self):
+        counts = []
+        for payload in [self._payload("A1"), self._payload("A1"), self._payload("A1", product_num_ratings=5)]:
+            writer = ProductBatchWriter()
+            writer.add(payload)
+            writer.close()
+            counts.append((writer.inserted, writer.updated, writer.unchanged, writer.failed))
+        self.assertEqual(counts, [(1, 0, 0, 0), (0, 0, 1, 0), (0, 1, 0, 0)])
+
+
+class ResponseCacheInvalidationTests(TestCase):
+    def setUp(self):
+        # The file backend is the default because it is shared with management commands.
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        settings = override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location,
+        }})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.product = Product.objects.create(name="Kettle")
+        create_sale(self.product)
+
+    def _forecasts(self, **headers):
+        return self.client.get("/sales-forecast/", {"product_id": self.product.pk}, headers=headers)
+
+    def test_bulk_forecast_job_invalidates_cached_forecasts(self):
+        first = self._forecasts()
+        self.assertEqual(first.json()["forecasts"], [])
+        self.assertEqual(self._forecasts(if_none_match=first["ETag"]).status_code, 304)
+
+        # A bulk write without invalidate() sends no signal, so the cached response is still served.
+        SalesForecast.objects.bulk_create([
+            SalesForecast(product=self.product, forecast_date=timezone.now().date(), period="Monthly", predicted_sales=1)
+        ])
+        self.assertEqual(self._forecasts().content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True), redirect_stdout(StringIO()):
+            forecast_timeseries(method="holt", period="Monthly", horizon=1, history=3)
+        fresh = self._forecasts(if_none_match=first["ETag"])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual({row["method"] for row in fresh.json()["forecasts"]}, {"sentiment", "holt"})
+
+
+    def test_order_item_writes_invalidate_orders(self):
+        topics = ("orders",)
+        before = generations(topics)
+        item = OrderItem.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            item.quantity = 5
+            item.save()
+        after_save = generations(topics)
+        self.assertNotEqual(after_save, before)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertNotEqual(generations(topics), after_save)
+
+
+class RecommendationIndexRecoveryTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        settings = override_settings(ML_MODEL_DIR=location)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.products = Product.objects.bulk_create([Product(name=f"Product {i}") for i in range(4)])
+
+    def _buy(self, customer, *positions):
+        for position in positions:
+            create_sale(self.products[position], customer=customer)
+
+    def _assert_counts_match_history(self):
+        index = recommendations._load_index()
+        base, base_watermark = recommendations._load_cooccurrence()
+        pending = recommendations._pending_delta(index, base_watermark)
+        size = len(index["product_ids"])
+        base.resize((size, size))
+        matrix, product_ids = recommendations.purchase_matrix()
+        np.testing.assert_array_equal(index["product_ids"], product_ids)
+        np.testing.assert_array_equal((base + pending).toarray(), (matrix.T @ matrix).toarray())
+
+    def test_interrupted_update_is_not_counted_twice(self):
+        with redirect_stdout(StringIO()):
+            self._buy("ada", 0, 1)
+            recommendations.build_recommendation_index()
+            self._buy("bob", 0, 2)
+            with mock.patch.object(recommendations, "save_index", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    recommendations.update_recommendation_index()
+            recommendations.update_recommendation_index()
+        self._assert_counts_match_history()
+
+    def test_interrupted_compaction_is_not_counted_twice(self):
+        with redirect_stdout(StringIO()):
+            self._buy("ada", 0, 1)
+            recommendations.build_recommendation_index()
+            self._buy("bob", 0, 2)
+            recommendations.update_recommendation_index()
+            # The merged base is saved, but the index (and its delta) is not rewritten.
+            with mock.patch.object(recommendations, "save_index", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    recommendations.compact_recommendation_index()
+            self._buy("cy", 1, 3)
+            recommendations.update_recommendation_index()
+            self._assert_counts_match_history()
+            recommendations.compact_recommendation_index()
+        self._assert_counts_match_history()
+
+
+class RecommendationIndexTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        settings = override_settings(ML_MODEL_DIR=location)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(recommendations.recommendation_index.reset)
+        self.products = Product.objects.bulk_create([Product(name=f"Product {i}") for i in range(4)])
+        for customer, positions in (("ada", (0, 1)), ("bob", (0, 1)), ("cy", (0, 2)), ("dan", (3,))):
+            for position in positions:
+                create_sale(self.products[position], customer=customer)
+
+    def test_top_k_cosine_neighbours(self):
+        matrix, product_ids = recommendations.purchase_matrix()
+        similarity = recommendations.cosine_similarity((matrix.T @ matrix).tocsr())
+        neighbors, scores = recommendations.top_k_neighbors(similarity, top_k=2)
+
+        # Product 0 was bought by 3 customers, 1 by 2 of them and 2 by 1 of them.
+        self.assertEqual([[int(product_ids[n]) if n >= 0 else None for n in row] for row in neighbors], [
+            [self.products[1].pk, self.products[2].pk],
+            [self.products[0].pk, None],
+            [self.products[0].pk, None],
+            [None, None],
+        ])
+        np.testing.assert_allclose(scores[0], [2 / np.sqrt(6), 1 / np.sqrt(3)], rtol=1e-6)
+        np.testing.assert_allclose(scores[1:, 0], [2 / np.sqrt(6), 1 / np.sqrt(3), 0], rtol=1e-6)
+
+    def test_cancelled_purchases_are_not_treated_as_owned(self):
+        create_sale(self.products[1], customer="eve")
+        create_sale(self.products[0], customer="eve")
+        Order.objects.filter(customer__email="eve@example.com", items__product=self.products[0]).update(
+            status="Cancelled"
+        )
+        with redirect_stdout(StringIO()):
+            recommendations.build_recommendation_index()
+        eve = Customer.objects.get(email="eve@example.com")
+
+        recommended = recommendations.recommend_products(eve.pk, limit=1)
+        self.assertEqual([row["product_id"] for row in recommended], [self.products[0].pk])
+        # Eve's completed purchase makes 3 buyers of product 1, 2 of whom also bought product 0.
+        self.assertEqual(recommended[0]["score"], round(2 / 3, 4))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        customer = Customer.objects.create(first_name="Ada", last_name="Lovelace", email="ada@example.com")
+        Order.objects.bulk_create([
+            Order(order_number=f"A-{i}", customer=customer, total_amount=i) for i in range(7)
+        ])
+        # Ties on the leading sort key must be broken by id without skipping or repeating rows.
+        moment = timezone.now()
+        for position, pk in enumerate(Order.objects.order_by("id").values_list("id", flat=True)):
+            Order.objects.filter(pk=pk).update(order_date=moment - timedelta(days=position // 3))
+
+    def _walk(self, url):
+        ids, cursor = [], None
+        while True:
+            response = self.client.get(url, {"page_size": 2, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            ids.extend(row["id"] for row in page["results"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_cursor_walk_visits_every_row_once_in_order(self):
+        expected = list(Order.objects.order_by("-order_date", "-id").values_list("id", flat=True))
+        self.assertEqual(self._walk("/api/orders/"), expected)
+        self.assertEqual(self._walk("/async/api/orders/"), expected)
+
+    def test_cursor_round_trips_typed_values(self):
+        order = Order.objects.order_by("id").first()
+        cursor = encode_cursor([order.order_date, order.pk])
+        self.assertEqual(decode_cursor(cursor, Order, ["order_date", "id"]), [order.order_date, order.pk])
+
+    def test_tampered_cursor_is_a_bad_request(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("not-a-cursor", Order, ["order_date", "id"])
+        self.assertEqual(self.client.get("/api/orders/", {"cursor": "not-a-cursor"}).status_code, 400)
+        self.assertEqual(self.client.get("/async/api/orders/", {"cursor": "not-a-cursor"}).status_code, 400)
+
+
+class PriceRollupResumeTests(TestCase):
+    def test_interrupted_rollup_resumes_without_double_counting(self):
+        product = Product.objects.create(name="Kettle")
+        seen_at = timezone.now().replace(hour=12)
+        PriceHistory.objects.bulk_create([
+            PriceHistory(product=product, platform="Amazon", price=price, scraped_date=seen_at + timedelta(minutes=i))
+            for i, price in enumerate([10, 12, 11, 9, 13])
+        ])
+        merge_batch = pricing._rollup_batch
+        calls = []
+
+        def fail_second_batch(rows):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+            return merge_batch(rows)
+
+        with redirect_stdout(StringIO()):
+            with mock.patch.object(pricing, "_rollup_batch", side_effect=fail_second_batch):
+                with self.assertRaises(RuntimeError):
+                    pricing.rollup_price_history(batch_size=2)
+            # Only the first batch was committed, together with its watermark.
+            rollup = DailyPriceRollup.objects.get()
+            self.assertEqual(rollup.sample_count, 2)
+            self.assertEqual(pricing.rollup_price_history(batch_size=2), 3)
+
+        rollup = DailyPriceRollup.objects.get()
+        self.assertEqual((rollup.sample_count, rollup.price_sum), (5, 55))
+        self.assertEqual((rollup.open_price, rollup.close_price, rollup.low_price, rollup.high_price), (10, 13, 9, 13))
+        self.assertEqual(
+            JobWatermark.objects.get(name=pricing.ROLLUP_WATERMARK).last_id,
+            PriceHistory.objects.order_by("-id").values_list("id", flat=True).first(),
+        )
+
+
+class ProductDetailMigrationTests(TransactionTestCase):
+    before = [("crm", "0014_dashboard_snapshot")]
+    after = [("crm", "0015_product_detail")]
+    details = {"description": "A kettle.", "customers_say": "Boils fast.", "product_details": {"Colour": "Steel"}}
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self._migrate(MigrationExecutor(connection).loader.graph.leaf_nodes("crm"))
+
+    def test_details_are_copied_out_and_restored(self):
+        old_apps = self._migrate(self.before)
+        pk = old_apps.get_model("crm", "Product").objects.create(name="Kettle", **self.details).pk
+        old_apps.get_model("crm", "Product").objects.create(name="Plain")
+
+        new_apps = self._migrate(self.after)
+        detail = new_apps.get_model("crm", "ProductDetail").objects.get(product_id=pk)
+        self.assertEqual({name: getattr(detail, name) for name in self.details}, self.details)
+        self.assertEqual(new_apps.get_model("crm", "ProductDetail").objects.count(), 2)
+
+        old_apps = self._migrate(self.before)
+        product = old_apps.get_model("crm", "Product").objects.get(pk=pk)
+        self.assertEqual({name: getattr(product, name) for name in self.details}, self.details)
+
+
+class ExportAccessTests(TestCase):
+    def test_exports_require_a_staff_login(self):
+        Customer.objects.create(first_name="Ada", last_name="Lovelace", email="ada@example.com")
+        response = self.client.get("/export/customers/")
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/admin/login/", response["Location"])
+
+        self.client.force_login(get_user_model().objects.create_user("clerk", password="x"))
+        self.assertEqual(self.client.get("/export/customers/").status_code, 302)
+
+        self.client.force_login(get_user_model().objects.create_user("staff", password="x", is_staff=True))
+        response = self.client.get("/export/customers/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"ada@example.com", b"".join(response.streaming_content))
+
+
+class IdParameterTests(TestCase):
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_non_integer_ids_are_a_bad_request(self):
+        endpoints = {
+            "sales-forecast/": "product_id", "recommendations/": "customer_id", "pricing-insights/": "product_id",
+        }
+        for prefix in ("/", "/async/"):
+            for endpoint, name in endpoints.items():
+                with self.subTest(url=prefix + endpoint):
+                    response = self.client.get(prefix + endpoint, {name: "abc"})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {"error": f"'{name}' must be an integer."})
+                    self.assertEqual(self.client.get(prefix + endpoint, {name: "7"}).status_code, 200)
+
+
+class ModelRegistryReloadTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        settings = override_settings(ML_MODEL_DIR=location)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(model_registry.clear_cache)
+
+    def _pin_elsewhere(self, version):
+        # What another process's set_current_version() leaves behind: this process's cache is untouched.
+        pointer = model_registry._model_dir("demo") / model_registry.CURRENT_POINTER
+        tmp_pointer = pointer.with_name("CURRENT.tmp")
+        tmp_pointer.write_text(str(version))
+        os.replace(tmp_pointer, pointer)
+
+    def test_serving_process_follows_pins_and_rollbacks_from_other_processes(self):
+        self.assertIsNone(model_registry.get_model("demo"))
+        model_registry.save_model("demo", {"weights": [1]})
+        model_registry.save_model("demo", {"weights": [2]})
+        self.assertEqual(model_registry.get_model("demo")["version"], 2)
+
+        self._pin_elsewhere(1)
+        self.assertEqual(model_registry.get_model("demo")["version"], 1)
+        self._pin_elsewhere(2)
+        self.assertEqual(model_registry.get_model("demo")["version"], 2)
+
+        with mock.patch.object(model_registry, "load_model", wraps=model_registry.load_model) as load:
+            model_registry.get_model("demo")
+        load.assert_not_called()
+
+
+class RefreshSelectionTests(TestCase):
+    def test_unfetched_then_most_volatile_of_the_stalest(self):
+        now = timezone.now()
+        ages = {"STATIC": 100, "VOLATILE": 60, "RECENT": 1, "FRESH": 0.5}
+        products = {
+            asin: Product.objects.create(name=asin, asin=asin, last_fetched_at=now - timedelta(hours=hours))
+            for asin, hours in ages.items()
+        }
+        Product.objects.create(name="Listed", asin="LISTED")
+        PriceHistory.objects.bulk_create([
+            PriceHistory(product=products[asin], platform="Amazon", price=price, scraped_date=now - timedelta(hours=i))
+            for asin, prices in {"VOLATILE": [10, 11, 12], "FRESH": [1, 2, 3, 4, 5, 6]}.items()
+            for i, price in enumerate(prices)
+        ])
+
+        self.assertEqual(select_refresh_asins(["NEW", "STATIC"], 2), ["NEW", "LISTED"])
+        # 60 hours x 3 prices outranks 100 hours x 1 price.
+        self.assertEqual(select_refresh_asins(["NEW"], 3), ["NEW", "LISTED", "VOLATILE"])
+        # FRESH is volatile but not among the stalest candidates, so it is never weighed.
+        self.assertEqual(
+            select_refresh_asins([], 4, candidate_factor=1), ["LISTED", "VOLATILE", "STATIC", "RECENT"]
+        )
+
+
+class ScrapeProductsOptionTests(TestCase):
+    def test_non_positive_counts_are_rejected(self):
+        for option in ("workers", "batch_size", "limit"):
+            for value in (0, -1):
+                with self.subTest(option=option, value=value), self.assertRaises(CommandError):
+                    call_command("scrape_products", **{option: value})
+
+
+class PriceHistoryCompactionTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Kettle")
+        self.old_day = (timezone.now() - timedelta(days=200)).replace(hour=8, minute=0, second=0, microsecond=0)
+
+    def _history(self, *observations):
+        """``(minutes after old_day 08:00, price)`` pairs."""
+        return PriceHistory.objects.bulk_create([
+            PriceHistory(product=self.product, platform="Amazon", price=price,
+                         scraped_date=self.old_day + timedelta(minutes=minutes))
+            for minutes, price in observations
+        ])
+
+    def test_redundant_rows_keep_the_last_of_each_bucket_and_drop_repeats(self):
+        at = self.old_day
+        rows = [
+            (1, 1, "Amazon", 10, at), (2, 1, "Amazon", 11, at + timedelta(minutes=30)),  # same hour
+            (3, 1, "Amazon", 11, at + timedelta(hours=1)),  # repeats the last kept price
+            (4, 1, "Amazon", 12, at + timedelta(hours=2)),
+            (5, 1, "Other", 12, at + timedelta(hours=2)),  # another platform is its own series
+        ]
+        self.assertEqual(sorted(pricing.redundant_price_rows(rows, "hourly")), [1, 3])
+        self.assertEqual(sorted(pricing.redundant_price_rows(rows, "daily")), [1, 2, 3])
+
+    def test_compaction_only_deletes_old_merged_rows(self):
+        self._history((0, 10), (20, 12), (60, 12), (120, 9))
+        recent = PriceHistory.objects.create(product=self.product, platform="Amazon", price=9)
+        with redirect_stdout(StringIO()):
+            pricing.rollup_price_history()
+            # Added after the rollup ran and kept out of it: the watermark guard must protect it.
+            unmerged, = self._history((121, 9))
+            with mock.patch.object(pricing, "rollup_price_history"):
+                result = pricing.compact_price_history(keep_days=90)
+
+        self.assertEqual(result["deleted"], 2)
+        remaining = list(PriceHistory.objects.order_by("id").values_list("id", "price"))
+        self.assertEqual([price for _, price in remaining], [12, 9, 9, 9])
+        self.assertIn(unmerged.pk, [pk for pk, _ in remaining])
+        self.assertIn(recent.pk, [pk for pk, _ in remaining])
+
+    def test_rebuild_keeps_rollups_of_compacted_days(self):
+        self._history((0, 10), (20, 12), (60, 12), (120, 9))
+        PriceHistory.objects.create(product=self.product, platform="Amazon", price=20)
+        with redirect_stdout(StringIO()):
+            pricing.compact_price_history(keep_days=90)
+            pricing.rebuild_price_rollups()
+            self.assertEqual(pricing.rollup_price_history(), 0)
+
+        old = DailyPriceRollup.objects.get(date=self.old_day.date())
+        self.assertEqual(
+            (old.open_price, old.high_price, old.low_price, old.close_price, old.sample_count), (10, 12, 9, 9, 4)
+        )
+        self.assertEqual(DailyPriceRollup.objects.get(date=timezone.localdate()).sample_count, 1)
+
+    def test_non_positive_batch_sizes_are_rejected(self):
+        for command in ("compact_price_history", "rollup_prices"):
+            with self.subTest(command=command), self.assertRaises(CommandError):
+                call_command(command, batch_size=0)
+
+
+class ForecastBacktestTests(TransactionTestCase):
+    # The chunks are scored on a thread pool whose connections only see committed rows.
+
+    def test_metrics_match_hand_computed_realised_sales(self):
+        product = Product.objects.create(name="Kettle")
+        current = int(period_ordinals([timezone.localdate()], "Monthly")[0])
+        month_starts = [day.item() for day in period_starts([current - 5, current - 2, current - 1], "Monthly")]
+        for start, quantity, predicted in zip(month_starts, (100, 4, 10), (1, 5, 8)):
+            ordered_at = timezone.make_aware(datetime.combine(start + timedelta(days=2), datetime.min.time()))
+            create_sale(product, quantity=quantity, days_ago=(timezone.now() - ordered_at).days)
+            SalesForecast.objects.create(
+                product=product, forecast_date=start, period="Monthly", method="holt", measure="quantity",
+                predicted_sales=predicted,
+            )
+        # Another method's forecast for the same month must not be scored.
+        SalesForecast.objects.create(
+            product=product, forecast_date=month_starts[1], period="Monthly", method="sentiment",
+            measure="quantity", predicted_sales=1000,
+        )
+
+        result = backtest_sales_forecasts(period="Monthly", windows=2, workers=2, method="holt", measure="quantity")
+        first, second = result["windows"]
+        self.assertEqual((first["count"], first["mae"], first["mape"]), (1, 1.0, 25.0))
+        self.assertEqual((second["count"], second["mae"], second["mape"]), (1, 2.0, 20.0))
+        overall = result["overall"]
+        self.assertEqual((overall["count"], overall["mae"], overall["mape"]), (2, 1.5, 22.5))
+        self.assertAlmostEqual(overall["rmse"], (5 / 2) ** 0.5)
+
+
+class DashboardRefreshTests(TestCase):
+    def _refresh(self, full=False):
+        with redirect_stdout(StringIO()):
+            return refresh_dashboard(full=full).data
+
+    def _score(self, customer, probability):
+        Customer.objects.filter(pk=customer.pk).update(churn_score=probability)
+        ChurnPrediction.objects.create(customer=customer, churn_probability=probability)
+
+    def test_sales_only_add_new_order_items(self):
+        product = Product.objects.create(name="Kettle")
+        create_sale(product, quantity=3)
+        month = (timezone.now() - timedelta(days=40)).strftime("%Y-%m")
+        self.assertEqual(self._refresh()["monthly_sales"], {month: 30.0})
+
+        create_sale(product, quantity=2)
+        self.assertEqual(self._refresh()["monthly_sales"], {month: 50.0})
+        self.assertEqual(self._refresh(full=True)["monthly_sales"], {month: 50.0})
+
+    def test_at_risk_pool_merges_new_predictions(self):
+        ada = Customer.objects.create(first_name="Ada", last_name="L", email="ada@example.com")
+        bob = Customer.objects.create(first_name="Bob", last_name="K", email="bob@example.com")
+        self._score(ada, 0.9)
+        self._score(bob, 0.6)
+        data = self._refresh()
+        self.assertEqual([row["customer_id"] for row in data["churn_customers"]], [ada.pk, bob.pk])
+
+        self._score(ada, 0.2)
+        data = self._refresh()
+        self.assertEqual(
+            [(row["customer_id"], row["churn_score"]) for row in data["churn_customers"]],
+            [(bob.pk, 0.6), (ada.pk, 0.2)],
+        )
+        self.assertEqual(data["churn_rate"], 50.0)
+
+    def test_segment_counts_refresh_without_new_predictions(self):
+        ada = Customer.objects.create(first_name="Ada", last_name="L", email="ada@example.com")
+        self._score(ada, 0.9)
+        self.assertEqual(self._refresh()["at_risk_by_segment"], {"Unsegmented": 1})
+
+        Customer.objects.filter(pk=ada.pk).update(segment=CustomerSegment.objects.create(name="High Value"))
+        data = self._refresh()
+        self.assertEqual(data["at_risk_by_segment"], {"High Value": 1})
+        self.assertEqual(data["churn_customers"][0]["segment"], "High Value")
+
+
+class ReviewSentimentTests(TestCase):
+    POLARITY = {"great": (0.8, 0.5), "awful": (-0.6, 0.5), "fine": (0.2, 0.5)}
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(review_sentiment, "ProcessPoolExecutor", ThreadPoolExecutor),
+            mock.patch.object(review_sentiment, "analyze_sentiment", self.POLARITY.get),
+            mock.patch.object(review_sentiment, "sentiment_cache", SentimentCache()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.customer = Customer.objects.create(first_name="Ada", last_name="L", email="ada@example.com")
+        self.product = Product.objects.create(name="Kettle")
+
+    def _review(self, comment, seconds_ago=60):
+        review = Review.objects.create(customer=self.customer, product=self.product, rating=4, comment=comment)
+        Review.objects.filter(pk=review.pk).update(updated_at=timezone.now() - timedelta(seconds=seconds_ago))
+        return review
+
+    def _score(self, **kwargs):
+        with redirect_stdout(StringIO()):
+            return review_sentiment.score_reviews(workers=1, **kwargs)
+
+    def test_resumes_across_chunks_in_updated_at_id_order(self):
+        reviews = [self._review(comment) for comment in ("great", "awful", "fine")]
+        # Equal timestamps are ordered by id.
+        Review.objects.filter(pk__in=[reviews[0].pk, reviews[1].pk]).update(
+            updated_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(self._score(chunk_size=2), 3)
+
+        watermark = JobWatermark.objects.get(name=review_sentiment.REVIEW_WATERMARK)
+        self.assertEqual(watermark.last_id, reviews[2].pk)
+        self.assertEqual(
+            list(Review.objects.order_by("id").values_list("sentiment_score", flat=True)),
+            [Decimal("0.80"), Decimal("-0.60"), Decimal("0.20")],
+        )
+        self.assertEqual(self._score(chunk_size=2), 0)
+
+    def test_recent_reviews_wait_for_the_settle_delay(self):
+        self._review("great")
+        recent = self._review("awful", seconds_ago=0)
+        self.assertEqual(self._score(), 1)
+        self.assertIsNone(Review.objects.get(pk=recent.pk).sentiment_score)
+
+        Review.objects.filter(pk=recent.pk).update(updated_at=timezone.now() - review_sentiment.SETTLE_DELAY)
+        self.assertEqual(self._score(), 1)
+        self.assertIsNotNone(Review.objects.get(pk=recent.pk).sentiment_score)
+
+    def test_scoring_leaves_updated_at_alone(self):
+        review = self._review("great")
+        before = Review.objects.get(pk=review.pk).updated_at
+        self._score()
+        self.assertEqual(Review.objects.get(pk=review.pk).updated_at, before)
+
+    def test_product_mean_feeds_the_forecaster(self):
+        self._review("great")
+        self._review("awful")
+        self._score()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_sentiment, 0.1)
+
+        with mock.patch.object(ml_models.sentiment_cache, "polarity") as summary_polarity:
+            forecast = ml_models.forecast_sales_for_product(self.product)
+        summary_polarity.assert_not_called()
+        self.assertEqual(forecast["sentiment_polarity"], 0.1)
+
+    def test_rescore_clears_means_of_products_without_reviews(self):
+        review = self._review("great")
+        self._score()
+        review.delete()
+        self._score()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_sentiment, 0.8)
+
+        self._score(rescore=True)
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.review_sentiment)
+
+    def test_rejects_non_positive_chunk_size_and_workers(self):
+        for option in ("--chunk-size", "--workers"):
+            with self.subTest(option=option), self.assertRaisesMessage(CommandError, f"{option} must be at least 1."):
+                call_command("score_reviews", option, "0")
+
+
+class ChurnScoringTests(TestCase):
+    class _Model:
+        # Churn probability is the last purchase gap in days / 1000.
+        def __init__(self):
+            self.calls = 0
+
+        def predict_proba(self, features):
+            self.calls += 1
+            churn = features[:, 1] / 1000
+            return np.column_stack([1 - churn, churn])
+
+    class _Scaler:
+        def transform(self, features):
+            return features
+
+    def setUp(self):
+        self.model = self._Model()
+        self.artifact = {"model": self.model, "scaler": self._Scaler(), "version": 1}
+        for patcher in (
+            mock.patch.object(ml_models, "get_churn_model", lambda: self.artifact),
+            mock.patch.object(ml_models, "churn_batcher", ml_models.ChurnMicroBatcher(max_wait=0.2)),
+            mock.patch.object(ml_models, "churn_score_cache", LRUCache(maxsize=100)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_micro_batcher_coalesces_concurrent_requests(self):
+        batcher = ml_models.churn_batcher
+        futures = [batcher.submit(np.array([[0.0, gap]] * size)) for gap, size in ((100, 2), (200, 1), (300, 3))]
+        results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual([version for version, _ in results], [1, 1, 1])
+        self.assertEqual([list(probabilities) for _, probabilities in results], [[0.1, 0.1], [0.2], [0.3] * 3])
+
+    def test_cached_scores_are_invalidated_by_purchases_and_new_models(self):
+        today = timezone.localdate()
+        ada = Customer.objects.create(
+            first_name="Ada", last_name="L", email="ada@example.com", last_purchase_date=today - timedelta(days=100)
+        )
+        self.assertEqual(ml_models.predict_churn_many([ada.pk]), {ada.pk: 0.1})
+        self.assertEqual(ml_models.predict_churn_many([ada.pk]), {ada.pk: 0.1})
+        self.assertEqual(self.model.calls, 1)
+
+        Customer.objects.filter(pk=ada.pk).update(last_purchase_date=today - timedelta(days=300))
+        self.assertEqual(ml_models.predict_churn_many([ada.pk]), {ada.pk: 0.3})
+        self.assertEqual(self.model.calls, 2)
+
+        self.artifact = dict(self.artifact, version=2)
+        self.assertEqual(ml_models.predict_churn_many([ada.pk]), {ada.pk: 0.3})
+        self.assertEqual(self.model.calls, 3)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_batch_size_is_capped(self):
+        too_many = ",".join(str(pk) for pk in range(1, MAX_CHURN_BATCH + 2))
+        for prefix in ("/", "/async/"):
+            with self.subTest(prefix=prefix):
+                response = self.client.get(prefix + "churn-prediction/", {"customer_ids": too_many})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(
+                    response.json(),
+                    {"error": f"At most {MAX_CHURN_BATCH} customer ids can be scored per request."},
+                )
+                response = self.client.get(prefix + "churn-prediction/", {"customer_ids": "1,x"})
+                self.assertEqual(response.json(), {"error": "Customer ids must be integers."})
+
+
+class SentimentForecastTests(TestCase):
+    def _forecast(self, *args):
+        with redirect_stdout(StringIO()):
+            call_command("forecast_sales", "--method", "sentiment", "--workers", "1", *args, stdout=StringIO())
+
+    def test_period_option_is_stored(self):
+        Product.objects.create(name="Kettle", sales_volume_units=100, review_sentiment=0.2)
+        self._forecast()
+        self._forecast("--period", "Weekly")
+        self.assertEqual(
+            sorted(SalesForecast.objects.values_list("period", "predicted_sales")),
+            [("Monthly", 110.0), ("Weekly", 110.0)],
+        )
+
+    def test_no_process_pool_without_cache_misses(self):
+        Product.objects.create(name="Kettle", sales_volume_units=100, review_sentiment=0.2)
+        with mock.patch.object(ml_models, "ProcessPoolExecutor") as pool:
+            self._forecast()
+        pool.assert_not_called()
+        self.assertEqual(SalesForecast.objects.count(), 1)
+
+
+class ForecastOptionTests(TestCase):
+    def test_rejects_non_positive_sizes(self):
+        cases = {
+            "forecast_sales": ("--horizon", "--history", "--chunk-size", "--workers"),
+            "evaluate_sales_forecast": ("--windows", "--workers", "--chunk-size"),
+        }
+        for command, options in cases.items():
+            for option in options:
+                for value in ("0", "-1"):
+                    with self.subTest(command=command, option=option, value=value):
+                        with self.assertRaisesMessage(CommandError, f"{option} must be at least 1."):
+                            call_command(command, "--method", "holt", option, value)
+
+
+class ResponseStoreTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def _payload(self, asin, price="$10.00"):
+        return {"status": "OK", "data": {"asin": asin, "product_title": f"Product {asin}", "product_price": price}}
+
+    def test_round_trip_across_segments(self):
+        fetched_at = timezone.now().replace(microsecond=0)
+        with ResponseStore(self.root, segment_max_bytes=1) as store:
+            for asin in ("A1", "A2", "A3"):
+                store.append(asin, self._payload(asin), fetched_at=fetched_at)
+
+        store = ResponseStore(self.root)
+        self.assertEqual(len(store._segments()), 3)
+        self.assertEqual(
+            list(store.iter_records()), [(asin, fetched_at, self._payload(asin)) for asin in ("A1", "A2", "A3")]
+        )
+        self.assertEqual(
+            [(asin, offset) for asin, _, _, offset in store.iter_index()], [("A1", 0), ("A2", 0), ("A3", 0)]
+        )
+
+    def test_truncated_last_member_is_skipped(self):
+        with ResponseStore(self.root) as store:
+            store.append("A1", self._payload("A1"))
+            store.append("A2", self._payload("A2"))
+        segment = ResponseStore(self.root)._segments()[0]
+        with open(segment, "r+b") as f:
+            f.truncate(segment.stat().st_size - 12)
+
+        with redirect_stdout(StringIO()) as output:
+            records = list(ResponseStore(self.root).iter_records())
+        self.assertEqual([asin for asin, _, _ in records], ["A1"])
+        self.assertIn("truncated", output.getvalue())
+
+    def test_replay_rebuilds_products_idempotently(self):
+        with ResponseStore(self.root) as store:
+            store.append("A1", self._payload("A1"), fetched_at=timezone.now() - timedelta(hours=2))
+            store.append("A1", self._payload("A1", price="$12.00"), fetched_at=timezone.now() - timedelta(hours=1))
+            store.append("A2", {"status": "ERROR"})
+
+        with override_settings(SCRAPE_CACHE_DIR=self.root):
+            for _ in range(2):
+                with redirect_stdout(StringIO()):
+                    call_command("scrape_products", "--replay", stdout=StringIO())
+
+        self.assertEqual(list(Product.objects.values_list("asin", "price")), [("A1", Decimal("12.00"))])
+        self.assertEqual(
+            sorted(PriceHistory.objects.values_list("price", flat=True)), [Decimal("10.00"), Decimal("12.00")]
+        )
+
+
+class ChurnUpdateTests(TestCase):
+    def setUp(self):
+        self.model = ChurnScoringTests._Model()
+        artifact = {"model": self.model, "scaler": ChurnScoringTests._Scaler(), "version": 1}
+        patcher = mock.patch.object(ml_models, "get_churn_model", lambda: artifact)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_scores_every_customer_across_chunks(self):
+        today = timezone.localdate()
+        gaps = [100, 200, 300, 400, None]
+        customers = [
+            Customer.objects.create(
+                first_name="C", last_name=str(i), email=f"c{i}@example.com",
+                last_purchase_date=None if gap is None else today - timedelta(days=gap),
+            )
+            for i, gap in enumerate(gaps)
+        ]
+        with redirect_stdout(StringIO()):
+            call_command("update", "--chunk-size", "2", stdout=StringIO())
+
+        expected = {customer.pk: 0.365 if gap is None else gap / 1000 for customer, gap in zip(customers, gaps)}
+        self.assertEqual(self.model.calls, 3)
+        self.assertEqual(
+            {pk: float(score) for pk, score in Customer.objects.values_list("id", "churn_score")},
+            {pk: round(score, 2) for pk, score in expected.items()},
+        )
+        predictions = dict(ChurnPrediction.objects.values_list("customer_id", "churn_probability"))
+        self.assertEqual(predictions.keys(), expected.keys())
+        for pk, probability in expected.items():
+            self.assertAlmostEqual(predictions[pk], probability)
+
+    def test_rejects_non_positive_chunk_size(self):
+        with self.assertRaisesMessage(CommandError, "--chunk-size must be at least 1."):
+            call_command("update", "--chunk-size", "0")
+
+
+class InitialChurnScoreTests(TestCase):
+    def test_scores_from_tenure_recency_and_spending_factor(self):
+        today = timezone.localdate()
+        # (days since registration, days since last purchase, spending factor) -> expected score
+        cases = [
+            ((399, 100, "1.20"), 0.3),
+            ((None, 10, "0.50"), 1.0),  # No registration date: tenure 0, clipped to 1.
+            ((729, None, None), 0.5),  # No purchase: 365 days; no spending factor: neutral.
+        ]
+        customers = []
+        for i, ((registered, purchased, factor), _) in enumerate(cases):
+            customer = Customer.objects.create(
+                first_name="C", last_name=str(i), email=f"c{i}@example.com",
+                registration_date=None if registered is None else today - timedelta(days=registered),
+                last_purchase_date=None if purchased is None else today - timedelta(days=purchased),
+            )
+            # save() assigns a random factor when none is set, so clear it with update().
+            Customer.objects.filter(pk=customer.pk).update(spending_factor=factor)
+            customers.append(customer)
+
+        with redirect_stdout(StringIO()):
+            call_command("initial_churn", "--chunk-size", "2", stdout=StringIO())
+        scores = dict(Customer.objects.values_list("id", "churn_score"))
+        self.assertEqual([float(scores[customer.pk]) for customer in customers], [score for _, score in cases])
+
+    def test_rejects_non_positive_chunk_size(self):
+        with self.assertRaisesMessage(CommandError, "--chunk-size must be at least 1."):
+            call_command("initial_churn", "--chunk-size", "0")
+
+
+class SentimentCacheTests(TestCase):
+    def setUp(self):
+        self.analysed = []
+
+    def _analyzer(self, texts):
+        self.analysed.append(sorted(texts))
+        return [(len(text) / 100, 0.5) for text in texts]
+
+    def test_get_many_only_analyses_misses(self):
+        cache = SentimentCache()
+        first = cache.get_many(["good", "bad"], analyzer=self._analyzer)
+        self.assertEqual(first, {"good": (0.04, 0.5), "bad": (0.03, 0.5)})
+        self.assertEqual(cache.get_many(["good", "fine"], analyzer=self._analyzer)["fine"], (0.04, 0.5))
+        self.assertEqual(self.analysed, [["bad", "good"], ["fine"]])
+        self.assertEqual(cache.stats(), {"memory_hits": 1, "db_hits": 0, "misses": 3, "hit_rate": 0.25})
+
+    def test_falls_back_to_the_stored_entries(self):
+        SentimentCache().get_many(["good"], analyzer=self._analyzer)
+        self.assertTrue(SentimentCacheEntry.objects.filter(key=sentiment_key("good")).exists())
+
+        # A fresh process has an empty LRU but shares the table.
+        cache = SentimentCache()
+        self.assertEqual(cache.get_many(["good"], analyzer=self._analyzer), {"good": (0.04, 0.5)})
+        self.assertEqual(cache.get_many(["good"], analyzer=self._analyzer), {"good": (0.04, 0.5)})
+        self.assertEqual(self.analysed, [["good"]])
+        self.assertEqual((cache.memory_hits, cache.db_hits, cache.misses), (1, 1, 0))
+
+    def test_least_recently_used_entries_are_evicted_from_memory(self):
+        cache = SentimentCache(maxsize=2)
+        for text in ("one", "two", "one", "three"):
+            cache.get_many([text], analyzer=self._analyzer)
+        SentimentCacheEntry.objects.all().delete()
+
+        cache.get_many(["one", "two"], analyzer=self._analyzer)
+        self.assertEqual(self.analysed[-1], ["two"])
+
+
+class LoadTestClientTests(TestCase):
+    RESPONSES = {
+        b"/chunked": (
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n6;ext=1\r\n world\r\n0\r\n\r\n"
+        ),
+        b"/length": b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+        b"/close": b"HTTP/1.1 503 Unavailable\r\nConnection: close\r\n\r\nbody until close",
+    }
+
+    def _load(self, paths, total):
+        async def handle(reader, writer):
+            while request := await reader.readline():
+                path = request.split()[1]
+                while await reader.readline() not in (b"\r\n", b""):
+                    pass
+                writer.write(self.RESPONSES[path])
+                await writer.drain()
+                if path == b"/close":
+                    break
+            writer.close()
+
+        async def load():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await run_load(f"http://127.0.0.1:{port}/", paths, concurrency=2, total=total)
+
+        return asyncio.run(load())
+
+    def test_reads_chunked_and_length_delimited_bodies_on_one_connection(self):
+        result = self._load(["chunked", "length"], total=10)
+        self.assertEqual((result["requests"], result["errors"]), (10, 0))
+
+    def test_close_delimited_bodies_reconnect(self):
+        result = self._load(["close", "length"], total=6)
+        self.assertEqual((result["requests"], result["errors"]), (6, 3))
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),  # Home Dashboard
@@ -7,9 +7,26 @@ urlpatterns = [
     path('customers/<int:id>/', views.customer_detail, name='customer_detail'),
     path('products/', views.product_list, name='product_list'),
     path('orders/', views.order_list, name='order_list'),
+    path('api/customers/', views.customer_list_api, name='customer_list_api'),
+    path('api/products/', views.product_list_api, name='product_list_api'),
+    path('api/orders/', views.order_list_api, name='order_list_api'),
+    path('export/<str:dataset>/', views.export_data, name='export_data'),
     path('churn-prediction/', views.churn_prediction, name='churn_prediction'),
     path('sales-forecast/', views.sales_forecast, name='sales_forecast'),
     path('recommendations/', views.product_recommendations, name='product_recommendations'),
     path('pricing-insights/', views.pricing_insights, name='pricing_insights'),  # New URL for pricing insights
 
+    # Async variants, for serving under ASGI
+    path('async/customers/', async_views.customer_list, name='async_customer_list'),
+    path('async/customers/<int:id>/', async_views.customer_detail, name='async_customer_detail'),
+    path('async/products/', async_views.product_list, name='async_product_list'),
+    path('async/orders/', async_views.order_list, name='async_order_list'),
+    path('async/api/customers/', async_views.customer_list_api, name='async_customer_list_api'),
+    path('async/api/products/', async_views.product_list_api, name='async_product_list_api'),
+    path('async/api/orders/', async_views.order_list_api, name='async_order_list_api'),
+    path('async/churn-prediction/', async_views.churn_prediction, name='async_churn_prediction'),
+    path('async/sales-forecast/', async_views.sales_forecast, name='async_sales_forecast'),
+    path('async/recommendations/', async_views.product_recommendations, name='async_product_recommendations'),
+    path('async/pricing-insights/', async_views.pricing_insights, name='async_pricing_insights'),
+
 ]
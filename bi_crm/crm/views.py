@@ -1,50 +1,219 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from .models import Customer, Product, Order
-from .ml_models import predict_and_update_churn, forecast_and_store_sales, recommend_products, get_pricing_trends
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from .models import Customer, Product, Order, SalesForecast
+from .caching import cached_json_view
+from .dashboard import dashboard_context
+from .exports import DATASETS, FORMATS, export_stream
+from .ml_models import predict_churn_many
+from .pagination import InvalidCursor, keyset_paginate, page_size_from
+from .pricing import get_pricing_trends
+from .recommendations import recommend_products
 
 # Dashboard View
 def dashboard(request):
-    return render(request, 'crm/dashboard.html')
+    # Everything shown is precomputed by the refresh_dashboard command.
+    return render(request, 'crm/dashboard.html', dashboard_context())
+
+# --------------------------
+# List Views
+# --------------------------
+# Each list page fetches only the columns its template shows, joins the
+# related rows it needs up front, and pages with a keyset cursor on an
+# indexed sort key. The /api/ variants return the same pages as JSON.
+
+CUSTOMER_LIST_FIELDS = (
+    'id', 'first_name', 'last_name', 'email', 'phone', 'churn_score', 'last_purchase_date', 'segment__name',
+)
+CUSTOMER_SORTS = {'newest': ('-id',), 'oldest': ('id',)}
+
+PRODUCT_LIST_FIELDS = ('id', 'name', 'category', 'price', 'rating')
+PRODUCT_ORDERING = ('id',)
+
+ORDER_LIST_FIELDS = (
+    'id', 'order_number', 'order_date', 'total_amount', 'status', 'customer__first_name', 'customer__last_name',
+)
+ORDER_ORDERING = ('-order_date', '-id')
+
+
+def _list_page(request, queryset, ordering):
+    return keyset_paginate(queryset, ordering, request.GET.get('cursor'), page_size_from(request))
+
+
+def _json_page(page):
+    return JsonResponse({'results': page.items, 'next_cursor': page.next_cursor})
+
+
+def _customer_sort(request):
+    sort = request.GET.get('sort', 'newest')
+    return sort if sort in CUSTOMER_SORTS else 'newest'
 
 # Customers
 def customer_list(request):
-    customers = Customer.objects.all()
-    return render(request, 'crm/customers.html', {'customers': customers})
+    sort = _customer_sort(request)
+    customers = Customer.objects.select_related('segment').only(*CUSTOMER_LIST_FIELDS)
+    try:
+        page = _list_page(request, customers, CUSTOMER_SORTS[sort])
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    return render(request, 'crm/customers.html', {'customers': page.items, 'page': page, 'sort': sort})
+
+def customer_list_api(request):
+    customers = Customer.objects.values(*CUSTOMER_LIST_FIELDS)
+    try:
+        return _json_page(_list_page(request, customers, CUSTOMER_SORTS[_customer_sort(request)]))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
+@cached_json_view(ttl=300, depends_on=('customers',))
 def customer_detail(request, id):
     customer = get_object_or_404(Customer, id=id)
     return JsonResponse({'customer': {'name': f"{customer.first_name} {customer.last_name}", 'email': customer.email}})
 
 # Products
 def product_list(request):
-    products = Product.objects.all()
-    return render(request, 'crm/products.html', {'products': products})
+    products = Product.objects.only(*PRODUCT_LIST_FIELDS)
+    try:
+        page = _list_page(request, products, PRODUCT_ORDERING)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    return render(request, 'crm/products.html', {'products': page.items, 'page': page})
+
+def product_list_api(request):
+    products = Product.objects.values(*PRODUCT_LIST_FIELDS)
+    try:
+        return _json_page(_list_page(request, products, PRODUCT_ORDERING))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
 # Orders
 def order_list(request):
-    orders = Order.objects.all()
-    return render(request, 'crm/orders.html', {'orders': orders})
+    orders = Order.objects.select_related('customer').only(*ORDER_LIST_FIELDS)
+    try:
+        page = _list_page(request, orders, ORDER_ORDERING)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    return render(request, 'crm/orders.html', {'orders': page.items, 'page': page})
+
+def order_list_api(request):
+    orders = Order.objects.values(*ORDER_LIST_FIELDS)
+    try:
+        return _json_page(_list_page(request, orders, ORDER_ORDERING))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+# Bulk Exports
+# Full customer and order dumps carry personal data, so only staff may download them.
+@staff_member_required
+def export_data(request, dataset):
+    # ?format=csv|ndjson, &gzip=1 for a compressed download
+    if dataset not in DATASETS:
+        raise Http404(f"Unknown export '{dataset}'.")
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest(f"Unknown format '{export_format}'.")
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    response = StreamingHttpResponse(
+        export_stream(dataset, export_format, compress),
+        content_type='application/gzip' if compress else FORMATS[export_format][1],
+    )
+    filename = f"{dataset}.{export_format}" + ('.gz' if compress else '')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def id_param(request, name):
+    # ?product_id= / ?customer_id=, 1 if not provided; raises ValueError if it is not an integer.
+    return int(request.GET.get(name, 1))
+
+def invalid_id_response(name):
+    return JsonResponse({'error': f"'{name}' must be an integer."}, status=400)
 
 # Churn Prediction View
+@cached_json_view(ttl=300, depends_on=('customers', 'orders', 'churn_model'))
 def churn_prediction(request):
-    customer_id = request.GET.get("customer_id", 1)  # Default customer ID if not provided
-    churn_score = predict_churn(customer_id)
-    return JsonResponse({'customer_id': customer_id, 'churn_score': churn_score})
+    try:
+        customer_ids, batch = churn_request_ids(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    try:
+        scores = predict_churn_many(customer_ids)
+    except RuntimeError as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    return churn_response(customer_ids, batch, scores)
+
+# Upper bound on ?customer_ids= so one request cannot tie up the scorer.
+MAX_CHURN_BATCH = 1000
+
+def churn_request_ids(request):
+    # Accepts ?customer_ids=1,2,3 for batch scoring, otherwise a single ?customer_id=
+    raw_ids = request.GET.get("customer_ids")
+    try:
+        if raw_ids:
+            customer_ids = [int(pk) for pk in raw_ids.split(",") if pk.strip()]
+        else:
+            customer_ids = [int(request.GET.get("customer_id", 1))]  # Default customer ID if not provided
+    except ValueError:
+        raise ValueError('Customer ids must be integers.') from None
+    if len(customer_ids) > MAX_CHURN_BATCH:
+        raise ValueError(f'At most {MAX_CHURN_BATCH} customer ids can be scored per request.')
+    return customer_ids, bool(raw_ids)
+
+def churn_response(customer_ids, batch, scores):
+    if batch:
+        return JsonResponse({'churn_scores': [
+            {'customer_id': pk, 'churn_score': scores.get(pk)} for pk in customer_ids
+        ]})
+    customer_id = customer_ids[0]
+    if customer_id not in scores:
+        return JsonResponse({'error': f'Customer {customer_id} not found.'}, status=404)
+    return JsonResponse({'customer_id': customer_id, 'churn_score': scores[customer_id]})
 
 # Sales Forecasting View
+@cached_json_view(ttl=900, depends_on=('forecasts',))
 def sales_forecast(request):
-    forecast = forecast_sales()
-    return JsonResponse(forecast)
+    try:
+        product_id = id_param(request, 'product_id')
+    except ValueError:
+        return invalid_id_response('product_id')
+    return sales_forecast_response(product_id, sales_forecast_rows(product_id))
+
+def sales_forecast_rows(product_id):
+    # Forecasts are precomputed by the forecast_sales command; this only reads them back.
+    return (
+        SalesForecast.objects.filter(product_id=product_id)
+        .order_by('-forecast_date')
+        .values('forecast_date', 'period', 'method', 'measure', 'predicted_sales')[:12]
+    )
+
+def sales_forecast_response(product_id, forecasts):
+    return JsonResponse({'product_id': product_id, 'forecasts': [
+        {
+            'forecast_date': forecast['forecast_date'],
+            'period': forecast['period'],
+            'method': forecast['method'],
+            'measure': forecast['measure'],
+            'predicted_sales': float(forecast['predicted_sales']),
+        }
+        for forecast in forecasts
+    ]})
 
 # Product Recommendation View
+@cached_json_view(ttl=300, depends_on=('orders', 'recommendations'))
 def product_recommendations(request):
-    customer_id = request.GET.get("customer_id", 1)  # Default customer ID if not provided
+    try:
+        customer_id = id_param(request, 'customer_id')
+    except ValueError:
+        return invalid_id_response('customer_id')
     recommendations = recommend_products(customer_id)
     return JsonResponse({'customer_id': customer_id, 'recommended_products': recommendations})
 
 # Pricing Insights View
+@cached_json_view(ttl=900, depends_on=('prices',))
 def pricing_insights(request):
-    product_id = request.GET.get("product_id", 1)  # Default product ID if not provided
+    try:
+        product_id = id_param(request, 'product_id')
+    except ValueError:
+        return invalid_id_response('product_id')
     pricing_data = get_pricing_trends(product_id)
     return JsonResponse(pricing_data)